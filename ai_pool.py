@@ -0,0 +1,172 @@
+# ai_pool.py
+# Runs hard bot moves in worker processes so a long search never blocks
+# the telebot handler threads; easy and medium moves are computed inline.
+import asyncio
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from config import AI_WORKERS, MOVE_TIME_BUDGET, PARALLEL_ROOT_SEARCH, ENDGAME_EMPTY_CELLS, logger
+from bitboard import CELL_COUNT
+from game_logic import bot_move, BOT
+from opening_book import book_move
+from position_cache import move_cache
+from search import score_root_move, combine_root_scores, WIN_SCORE
+
+# concurrent root-parallel searches; each gets one shared bound per depth
+BOUND_SLOTS = 16
+BOUND_STRIDE = CELL_COUNT + 1
+
+_executor = None
+_executor_lock = threading.Lock()
+_bounds = None
+_free_slots = list(range(BOUND_SLOTS))
+_slots_lock = threading.Lock()
+
+
+def _init_worker(bounds):
+    global _bounds
+    _bounds = bounds
+
+
+def _root_move_job(board, col, deadline, slot_index):
+    return score_root_move(board, col, BOT, deadline, _bounds, slot_index * BOUND_STRIDE)
+
+
+def start_pool():
+    global _executor, _bounds
+    with _executor_lock:
+        if _executor is None:
+            _bounds = multiprocessing.Array("i", BOUND_SLOTS * BOUND_STRIDE)
+            _executor = ProcessPoolExecutor(
+                max_workers=AI_WORKERS, initializer=_init_worker, initargs=(_bounds,)
+            )
+            # the first submit forks every worker; do it now rather than
+            # from a handler thread
+            _executor.submit(int).result()
+    return _executor
+
+
+def shutdown_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def submit_bot_move(board, difficulty, on_done, on_error):
+    # on_done(col) / on_error(exc) run in the executor's result thread, or
+    # right away for easy and medium moves and known hard ones
+    snapshot = board.copy()
+    if difficulty != "hard":
+        # easy and medium take microseconds; queueing them behind hard
+        # searches in the pool would only make them wait
+        try:
+            col = bot_move(snapshot, difficulty)
+        except Exception as e:
+            logger.error(f"Bot move failed: {e}")
+            on_error(e)
+            return
+        on_done(col)
+        return
+    col = book_move(snapshot)
+    if col is None:
+        cached = move_cache.get(snapshot, "hard")
+        col = cached[0] if cached is not None else None
+    if col is not None:
+        on_done(col)
+        return
+    if PARALLEL_ROOT_SEARCH and _submit_parallel(snapshot, on_done, on_error):
+        return
+    future = start_pool().submit(bot_move, snapshot, difficulty)
+
+    def _callback(fut):
+        if fut.cancelled():
+            return
+        try:
+            col = fut.result()
+        except Exception as e:
+            logger.error(f"AI worker failed: {e}")
+            on_error(e)
+            return
+        if col is not None:
+            # workers have their own caches; keep the parent's one warm too
+            move_cache.put(snapshot, "hard", col)
+        on_done(col)
+
+    future.add_done_callback(_callback)
+
+
+async def bot_move_async(board, difficulty):
+    # submit_bot_move for the asyncio runtime: the callbacks hand the result
+    # back to the event loop thread
+    loop = asyncio.get_running_loop()
+    result = loop.create_future()
+
+    def _settle(setter, value):
+        if not result.done():
+            setter(value)
+
+    submit_bot_move(
+        board, difficulty,
+        lambda col: loop.call_soon_threadsafe(_settle, result.set_result, col),
+        lambda e: loop.call_soon_threadsafe(_settle, result.set_exception, e),
+    )
+    return await result
+
+
+def _submit_parallel(board, on_done, on_error):
+    # fan the root moves out to the pool; returns False to fall back to a
+    # single-job search
+    moves = board.valid_moves()
+    if len(moves) < 2 or CELL_COUNT - board.moves <= ENDGAME_EMPTY_CELLS:
+        # the endgame solver in bot_move beats splitting the root
+        return False
+    col = next((c for c in moves if board.is_winning_move(c, BOT)), None)
+    if col is not None:
+        on_done(col)
+        return True
+    with _slots_lock:
+        if not _free_slots:
+            return False
+        slot_index = _free_slots.pop()
+
+    executor = start_pool()
+    base = slot_index * BOUND_STRIDE
+    with _bounds.get_lock():
+        for i in range(base, base + BOUND_STRIDE):
+            _bounds[i] = -WIN_SCORE - 1
+
+    deadline = time.monotonic() + MOVE_TIME_BUDGET["hard"]
+    results = {}
+    pending = [len(moves)]
+    failed = []
+    lock = threading.Lock()
+
+    def _callback(fut, col):
+        with lock:
+            if fut.cancelled():
+                failed.append(None)
+            elif fut.exception() is not None:
+                failed.append(fut.exception())
+            else:
+                results[col] = fut.result()
+            pending[0] -= 1
+            if pending[0]:
+                return
+        with _slots_lock:
+            _free_slots.append(slot_index)
+        if failed:
+            if failed[0] is not None:
+                logger.error(f"AI worker failed: {failed[0]}")
+                on_error(failed[0])
+            return
+        col = combine_root_scores(results)
+        move_cache.put(board, "hard", col)
+        on_done(col)
+
+    for col in moves:
+        future = executor.submit(_root_move_job, board.copy(), col, deadline, slot_index)
+        future.add_done_callback(lambda fut, col=col: _callback(fut, col))
+    return True
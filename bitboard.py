@@ -0,0 +1,180 @@
+# bitboard.py
+# Bitboard representation of the 7x7 board.
+# Each column takes 8 bits (7 cells + 1 sentinel bit), bit 0 of a column is the
+# bottom cell. Slot 0 is the blue side ("player" / "player1"), slot 1 the red
+# side ("bot" / "player2").
+
+import random
+
+ROWS = 7
+COLS = 7
+H1 = ROWS + 1  # bits per column, including the sentinel
+
+PIECE_SLOT = {"player": 0, "player1": 0, "bot": 1, "player2": 1}
+
+BOTTOM_MASK = sum(1 << (col * H1) for col in range(COLS))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1)
+CELL_COUNT = ROWS * COLS
+
+# shift amounts for vertical, horizontal and the two diagonals
+DIRECTIONS = (1, H1, H1 - 1, H1 + 1)
+
+# Zobrist keys: one random 64-bit value per (slot, bit index). A fixed seed
+# keeps hashes identical across worker processes.
+_rng = random.Random(0x4A4C)
+ZOBRIST = [[_rng.getrandbits(64) for _ in range(COLS * H1)] for _ in range(2)]
+
+
+def bit_index(row, col):
+    # row 0 is the top row in the list-of-lists layout used by the renderers
+    return col * H1 + (ROWS - 1 - row)
+
+
+def bit_of(row, col):
+    return 1 << bit_index(row, col)
+
+
+def _build_windows():
+    windows = []
+    for col in range(COLS):
+        for h in range(ROWS):
+            for dc, dh in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(col + i * dc, h + i * dh) for i in range(4)]
+                if all(0 <= c < COLS and 0 <= r < ROWS for c, r in cells):
+                    windows.append(sum(1 << (c * H1 + r) for c, r in cells))
+    return windows
+
+
+# every four-in-a-row window, and the windows passing through each bit index
+WIN_WINDOWS = _build_windows()
+WINDOWS_THROUGH = [tuple(w for w in WIN_WINDOWS if w >> i & 1) for i in range(COLS * H1)]
+
+
+def wins_at(mask, index):
+    # does `mask` hold a four-in-a-row through bit `index`?
+    for window in WINDOWS_THROUGH[index]:
+        if mask & window == window:
+            return True
+    return False
+
+
+def top_bit(col):
+    return 1 << (col * H1 + ROWS - 1)
+
+
+def position_code(board):
+    # unique 56-bit code for a position with slot 1 as the reference side:
+    # every column's byte holds that side's stones plus a marker bit above
+    # the top stone, so the columns can be mirrored independently
+    occupied = board.masks[0] | board.masks[1]
+    return board.masks[1] + occupied + BOTTOM_MASK
+
+
+def mirror_code(code):
+    # left-right mirror: reverse the column bytes
+    return int.from_bytes(code.to_bytes(COLS, "little"), "big")
+
+
+def canonical_code(board):
+    # (smaller of the position code and its mirror, mirrored?)
+    code = position_code(board)
+    mirrored = mirror_code(code)
+    if mirrored < code:
+        return mirrored, True
+    return code, False
+
+
+def has_four(mask):
+    for shift in DIRECTIONS:
+        m = mask & (mask >> shift)
+        if m & (m >> (2 * shift)):
+            return True
+    return False
+
+
+class Board:
+    __slots__ = ("masks", "heights", "moves", "key")
+
+    def __init__(self):
+        self.masks = [0, 0]
+        # next free bit index per column
+        self.heights = [col * H1 for col in range(COLS)]
+        self.moves = 0
+        self.key = 0
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.masks = self.masks[:]
+        board.heights = self.heights[:]
+        board.moves = self.moves
+        board.key = self.key
+        return board
+
+    def can_play(self, col):
+        return self.heights[col] < col * H1 + ROWS
+
+    def valid_moves(self):
+        return [col for col in range(COLS) if self.heights[col] < col * H1 + ROWS]
+
+    def is_winning_move(self, col, slot):
+        # would dropping in `col` win for `slot`? (no make/unmake needed)
+        h = self.heights[col]
+        return wins_at(self.masks[slot] | (1 << h), h)
+
+    def play(self, col, slot):
+        # caller guarantees can_play(col)
+        h = self.heights[col]
+        self.masks[slot] |= 1 << h
+        self.heights[col] = h + 1
+        self.moves += 1
+        self.key ^= ZOBRIST[slot][h]
+        return ROWS - 1 - (h - col * H1)
+
+    def undo(self, col, slot):
+        h = self.heights[col] - 1
+        self.masks[slot] ^= 1 << h
+        self.heights[col] = h
+        self.moves -= 1
+        self.key ^= ZOBRIST[slot][h]
+
+    def is_full(self):
+        return self.moves >= CELL_COUNT
+
+    def cell(self, row, col):
+        bit = bit_of(row, col)
+        if self.masks[0] & bit:
+            return 0
+        if self.masks[1] & bit:
+            return 1
+        return None
+
+    def rows(self):
+        # top-to-bottom rows of slot values (0, 1 or None), for rendering
+        m0, m1 = self.masks
+        grid = []
+        for row in range(ROWS):
+            cells = []
+            for col in range(COLS):
+                bit = bit_of(row, col)
+                cells.append(0 if m0 & bit else 1 if m1 & bit else None)
+            grid.append(cells)
+        return grid
+
+
+def board_from_code(code):
+    # inverse of position_code: each column byte is slot 1's stones below a
+    # marker bit at the column height
+    board = Board()
+    for col in range(COLS):
+        column = (code >> (col * H1)) & 0xFF
+        height = column.bit_length() - 1
+        if not 0 <= height <= ROWS:
+            raise ValueError(f"bad column {col} in position code")
+        for h in range(height):
+            bit = 1 << (col * H1 + h)
+            slot = 1 if column >> h & 1 else 0
+            board.masks[slot] |= bit
+            board.key ^= ZOBRIST[slot][col * H1 + h]
+        board.heights[col] = col * H1 + height
+        board.moves += height
+    return board
@@ -0,0 +1,152 @@
+# broadcast.py
+# Admin broadcasts. Recipients are read from the users table in id order, a
+# chunk at a time, and sent by a small thread pool. One token bucket shared
+# by every broadcast keeps the send rate below Telegram's limit so game
+# traffic still gets through, and a 429 pauses the bucket for retry_after
+# seconds. The last user id of each finished chunk is saved, so a broadcast
+# interrupted by a restart resumes where it stopped. Delivery is
+# at-least-once: users of the chunk in flight at the restart get the
+# message again (at most BROADCAST_CHUNK_SIZE of them).
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+from telebot.apihelper import ApiTelegramException
+from config import (
+    BROADCAST_RATE, BROADCAST_WORKERS, BROADCAST_CHUNK_SIZE, BROADCAST_PROGRESS_INTERVAL, logger
+)
+from database import (
+    writer, count_users, get_user_ids_after, create_broadcast,
+    save_broadcast_progress, get_unfinished_broadcasts
+)
+
+# attempts per recipient when Telegram answers 429
+MAX_ATTEMPTS = 3
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # blocks until a token is available
+        while True:
+            with self._lock:
+                now = monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            sleep(wait)
+
+    def pause(self, seconds):
+        # no tokens for `seconds`, and refilling starts from empty afterwards
+        with self._lock:
+            until = monotonic() + seconds
+            if until > self._paused_until:
+                self._paused_until = until
+                self._updated = until
+                self._tokens = 0
+
+
+bucket = TokenBucket(BROADCAST_RATE, BROADCAST_RATE)
+_executor = ThreadPoolExecutor(BROADCAST_WORKERS, thread_name_prefix="broadcast")
+
+
+def _retry_after(e):
+    return (e.result_json.get("parameters") or {}).get("retry_after", 1)
+
+
+def _send(bot, user_id, text):
+    for _ in range(MAX_ATTEMPTS):
+        bucket.acquire()
+        try:
+            bot.send_message(user_id, text)
+            return True
+        except ApiTelegramException as e:
+            if e.error_code != 429:
+                # blocked the bot, deleted account, ...
+                return False
+            bucket.pause(_retry_after(e))
+        except Exception as e:
+            logger.error(f"Error broadcasting to {user_id}: {e}")
+            return False
+    return False
+
+
+def _progress_text(sent, failed, total):
+    return f"📢 در حال ارسال پیام همگانی: {sent + failed} از {total}\n✅ موفق: {sent} | ❌ ناموفق: {failed}"
+
+
+def _report(bot, admin_chat_id, progress, text):
+    # returns the progress message; while none exists yet each report tries
+    # to send one again
+    try:
+        if progress is None:
+            return bot.send_message(admin_chat_id, text)
+        bot.edit_message_text(text, admin_chat_id, progress.message_id)
+    except Exception as e:
+        logger.error(f"Error reporting broadcast progress: {e}")
+    return progress
+
+
+def _run(bot, broadcast_id, admin_chat_id, text, last_user_id, sent, failed):
+    try:
+        total = count_users()
+        progress = _report(bot, admin_chat_id, None, _progress_text(sent, failed, total))
+        reported = monotonic()
+        while True:
+            chunk = get_user_ids_after(last_user_id, BROADCAST_CHUNK_SIZE)
+            if not chunk:
+                break
+            delivered = sum(_executor.map(lambda user_id: _send(bot, user_id, text), chunk))
+            sent += delivered
+            failed += len(chunk) - delivered
+            last_user_id = chunk[-1]
+            save_broadcast_progress(broadcast_id, last_user_id, sent, failed)
+            if monotonic() - reported >= BROADCAST_PROGRESS_INTERVAL:
+                reported = monotonic()
+                progress = _report(bot, admin_chat_id, progress, _progress_text(sent, failed, total))
+        save_broadcast_progress(broadcast_id, last_user_id, sent, failed, done=True)
+        _report(bot, admin_chat_id, progress, _progress_text(sent, failed, max(total, sent + failed)))
+        bot.send_message(admin_chat_id, f"پیام به {sent} کاربر ارسال شد 📢")
+    except Exception as e:
+        logger.error(f"Error in broadcast {broadcast_id}: {e}")
+
+
+def _start(bot, broadcast_id, admin_chat_id, text, last_user_id=0, sent=0, failed=0):
+    thread = threading.Thread(
+        target=_run,
+        args=(bot, broadcast_id, admin_chat_id, text, last_user_id, sent, failed),
+        name=f"broadcast-{broadcast_id}",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def start_broadcast(bot, admin_chat_id, text):
+    # raises sqlite3.Error if the broadcast can't be recorded
+    writer.flush()  # include users still waiting in the write buffer
+    broadcast_id = create_broadcast(admin_chat_id, text)
+    return _start(bot, broadcast_id, admin_chat_id, text)
+
+
+def resume_broadcasts(bot):
+    # restart broadcasts that were still running when the bot stopped
+    try:
+        unfinished = get_unfinished_broadcasts()
+    except sqlite3.Error as e:
+        logger.error(f"Error loading unfinished broadcasts: {e}")
+        return []
+    return [_start(bot, *row) for row in unfinished]
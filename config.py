@@ -18,6 +18,99 @@ if not TOKEN:
 # Admin IDs (comma separated in .env)
 ADMIN_USER_IDS = [int(i) for i in os.getenv("ADMIN_USER_IDS", "").split(",") if i.strip()]
 
+# Update source: "polling" (getUpdates) or "webhook". Webhook mode serves
+# WEBHOOK_HOST:WEBHOOK_PORT at WEBHOOK_PATH, requires the
+# X-Telegram-Bot-Api-Secret-Token header to equal WEBHOOK_SECRET and
+# registers WEBHOOK_URL with Telegram (left empty, only local POSTs arrive).
+# Up to WEBHOOK_QUEUE_SIZE updates wait for the handlers.
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+
+# Telegram API client: keep-alive connections shared by all threads,
+# connect / read timeouts in seconds, and retries for flood waits and
+# transient server errors
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", "16"))
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv("TELEGRAM_CONNECT_TIMEOUT", "5"))
+TELEGRAM_READ_TIMEOUT = float(os.getenv("TELEGRAM_READ_TIMEOUT", "15"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
+
+# Message edits to one chat are sent at least OUTBOX_CHAT_INTERVAL_MS
+# milliseconds apart by OUTBOX_WORKERS threads; newer edits replace waiting ones
+OUTBOX_CHAT_INTERVAL_MS = int(os.getenv("OUTBOX_CHAT_INTERVAL_MS", "500"))
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+
+# Multiplayer turn timer: its clock advances every TURN_TIMER_TICK_MS
+# milliseconds, the countdown on the board is refreshed every
+# MULTI_COUNTDOWN_INTERVAL seconds (0 turns it off), and a player who lets
+# MULTI_MAX_MISSED_TURNS turns in a row run out forfeits
+TURN_TIMER_TICK_MS = int(os.getenv("TURN_TIMER_TICK_MS", "100"))
+MULTI_COUNTDOWN_INTERVAL = int(os.getenv("MULTI_COUNTDOWN_INTERVAL", "5"))
+MULTI_MAX_MISSED_TURNS = int(os.getenv("MULTI_MAX_MISSED_TURNS", "3"))
+# Countdown refreshes are the first edits to go under load: at most
+# MULTI_COUNTDOWN_RATE per second across all games (0 for no limit), and
+# none while more than MULTI_COUNTDOWN_MAX_PENDING edits wait in the outbox
+MULTI_COUNTDOWN_RATE = int(os.getenv("MULTI_COUNTDOWN_RATE", "20"))
+MULTI_COUNTDOWN_MAX_PENDING = int(os.getenv("MULTI_COUNTDOWN_MAX_PENDING", "50"))
+
+# Stateless multiplayer: with STATELESS_MULTIPLAYER=1 a multiplayer game
+# lives only in its buttons' callback data, signed with CALLBACK_SECRET
+# (derived from TOKEN when empty), so any bot process can serve any click
+STATELESS_MULTIPLAYER = os.getenv("STATELESS_MULTIPLAYER", "0") == "1"
+CALLBACK_SECRET = os.getenv("CALLBACK_SECRET", "")
+
+# Rate limiting: each user earns RATE_LIMIT_PER_SECOND tokens a second, up
+# to RATE_LIMIT_BURST, and running out blocks them for RATE_LIMIT_BLOCK_SECONDS
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "2"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "3"))
+RATE_LIMIT_BLOCK_SECONDS = float(os.getenv("RATE_LIMIT_BLOCK_SECONDS", "30"))
+
+# SQLite connections kept open and shared between handler threads
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+
+# User and score writes are batched: flushed every DB_FLUSH_INTERVAL_MS
+# milliseconds or once DB_FLUSH_MAX_RECORDS users are pending
+DB_FLUSH_INTERVAL_MS = int(os.getenv("DB_FLUSH_INTERVAL_MS", "500"))
+DB_FLUSH_MAX_RECORDS = int(os.getenv("DB_FLUSH_MAX_RECORDS", "200"))
+
+# Number of worker processes used for bot moves
+AI_WORKERS = int(os.getenv("AI_WORKERS", os.cpu_count() or 1))
+
+# Wall-clock budget (seconds) for one bot move, per difficulty.
+# Difficulties missing here don't search.
+MOVE_TIME_BUDGET = {
+    "hard": float(os.getenv("HARD_MOVE_BUDGET", "1.5")),
+}
+
+# The hard bot solves the game exactly once this few cells are empty
+ENDGAME_EMPTY_CELLS = int(os.getenv("ENDGAME_EMPTY_CELLS", "16"))
+
+# Max entries in the cross-game cache of bot moves
+POSITION_CACHE_SIZE = int(os.getenv("POSITION_CACHE_SIZE", "100000"))
+
+# Max users kept in the in-memory cache in front of the users table
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+# Games idle for longer than GAME_TTL seconds are removed; the sweeper
+# checks every GAME_SWEEP_INTERVAL seconds
+GAME_TTL = int(os.getenv("GAME_TTL", "1800"))
+GAME_SWEEP_INTERVAL = int(os.getenv("GAME_SWEEP_INTERVAL", "60"))
+
+# Broadcasts: messages per second across all broadcasts (Telegram allows
+# about 30, the rest is left for games), sender threads, users read from the
+# DB per chunk, and seconds between progress updates to the admin
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "20"))
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "8"))
+BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", "500"))
+BROADCAST_PROGRESS_INTERVAL = int(os.getenv("BROADCAST_PROGRESS_INTERVAL", "10"))
+
+# Search each root move of a hard bot move in its own worker process
+PARALLEL_ROOT_SEARCH = os.getenv("PARALLEL_ROOT_SEARCH", "0") == "1"
+
 # Logging: only print ERROR and CRITICAL to terminal, with colors
 class ColorFormatter(logging.Formatter):
     COLORS = {
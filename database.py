@@ -1,15 +1,38 @@
 # database.py
 import sqlite3
 import os
-from config import logger
+from time import time
+from config import logger, DB_FLUSH_INTERVAL_MS, DB_FLUSH_MAX_RECORDS, USER_CACHE_SIZE
+from db import get_pool
+from write_behind import WriteBehindQueue
+from leaderboard import Leaderboard
+from lru_cache import LRUCache, MISSING
 
 USER_DB = "users.db"
 LEADERBOARD_DB = USER_DB  # both tables in same DB
 
+def _pool():
+    return get_pool(os.path.abspath(USER_DB))
+
+# user upserts and score updates are buffered and written in batches
+writer = WriteBehindQueue(_pool, DB_FLUSH_INTERVAL_MS / 1000, DB_FLUSH_MAX_RECORDS)
+
+# score-ordered copy of the leaderboard table, served from memory
+ranking = Leaderboard()
+
+# recently seen users: {user_id: (username, first_name)}. save_user
+# overwrites the entry, so it never goes stale; unknown users aren't cached.
+user_cache = LRUCache(USER_CACHE_SIZE)
+
+def start_writer():
+    writer.start()
+
+def stop_writer():
+    writer.stop()
+
 def init_databases():
-    db_path = os.path.abspath(USER_DB)
     try:
-        with sqlite3.connect(db_path) as conn:
+        with _pool().connection() as conn:
             cursor = conn.cursor()
             # users table
             cursor.execute('''
@@ -28,7 +51,36 @@ def init_databases():
                     FOREIGN KEY (user_id) REFERENCES users(user_id)
                 )
             ''')
-            conn.commit()
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard (score DESC)')
+            # broadcast progress: every user_id <= last_user_id has been handled
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS broadcasts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    admin_chat_id INTEGER,
+                    text TEXT,
+                    last_user_id INTEGER DEFAULT 0,
+                    sent INTEGER DEFAULT 0,
+                    failed INTEGER DEFAULT 0,
+                    done INTEGER DEFAULT 0
+                )
+            ''')
+            # results of stateless multiplayer games, so a replayed final
+            # click can't score twice; the random game key is only 4 bytes,
+            # so both players are part of the key
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS finished_games (
+                    game_key BLOB,
+                    player1_id INTEGER,
+                    player2_id INTEGER,
+                    finished_at INTEGER,
+                    PRIMARY KEY (game_key, player1_id, player2_id)
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_finished_games_at ON finished_games (finished_at)')
+            ranking.load(
+                cursor.execute('SELECT user_id, first_name, score FROM leaderboard').fetchall(),
+                cursor.execute('SELECT user_id, username FROM users').fetchall()
+            )
     except sqlite3.Error as e:
         logger.error(f"Error initializing database: {e}")
         raise
@@ -37,41 +89,91 @@ def save_user(user_id, username, first_name, admin_ids):
     # Do not save admin users (keeps parity with original)
     if user_id in admin_ids:
         return
-    try:
-        with sqlite3.connect(USER_DB) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT OR REPLACE INTO users (user_id, username, first_name) VALUES (?, ?, ?)',
-                (user_id, username if username else "ندارد", first_name if first_name else "بدون نام")
-            )
-            conn.commit()
-    except sqlite3.Error as e:
-        logger.error(f"Error saving user {user_id}: {e}")
+    username = username if username else "ندارد"
+    first_name = first_name if first_name else "بدون نام"
+    writer.upsert_user(user_id, username, first_name)
+    user_cache.put(user_id, (username, first_name))
+    ranking.set_user(user_id, username)
+
+def get_user_first_name(user_id):
+    # None when the user never ran /start
+    user = get_user(user_id)
+    return user[1] if user else None
+
+def get_user(user_id):
+    # (username, first_name), or None when the user never ran /start
+    cached = user_cache.get(user_id)
+    if cached is not MISSING:
+        return cached
+    user = writer.pending_user(user_id)
+    if user is None:
+        try:
+            with _pool().connection() as conn:
+                user = conn.execute('SELECT username, first_name FROM users WHERE user_id = ?', (user_id,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error fetching user {user_id}: {e}")
+            return None
+    if user is None:
+        # not cached: the user may run /start any moment
+        return None
+    user = tuple(user)
+    user_cache.put_if_absent(user_id, user)
+    return user
+
+def get_user_cache_stats():
+    return user_cache.stats()
+
+def get_user_ids_after(last_user_id, limit):
+    # next chunk of user ids in id order; raises sqlite3.Error
+    with _pool().connection() as conn:
+        rows = conn.execute(
+            'SELECT user_id FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?', (last_user_id, limit)
+        )
+        return [row[0] for row in rows]
+
+def count_users():
+    with _pool().connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+def create_broadcast(admin_chat_id, text):
+    with _pool().connection() as conn:
+        return conn.execute(
+            'INSERT INTO broadcasts (admin_chat_id, text) VALUES (?, ?)', (admin_chat_id, text)
+        ).lastrowid
+
+def save_broadcast_progress(broadcast_id, last_user_id, sent, failed, done=False):
+    with _pool().connection() as conn:
+        conn.execute(
+            'UPDATE broadcasts SET last_user_id = ?, sent = ?, failed = ?, done = ? WHERE id = ?',
+            (last_user_id, sent, failed, int(done), broadcast_id)
+        )
+
+def get_unfinished_broadcasts():
+    # [(id, admin_chat_id, text, last_user_id, sent, failed)]
+    with _pool().connection() as conn:
+        return conn.execute(
+            'SELECT id, admin_chat_id, text, last_user_id, sent, failed FROM broadcasts WHERE done = 0 ORDER BY id'
+        ).fetchall()
+
+def claim_game_result(game_key, player1_id, player2_id, keep_seconds):
+    # True for the first caller to finish this game, False afterwards.
+    # Results older than keep_seconds are pruned: their games' tokens have
+    # expired by then, so nothing can claim them again
+    now = int(time())
+    with _pool().connection() as conn:
+        conn.execute('DELETE FROM finished_games WHERE finished_at < ?', (now - keep_seconds,))
+        return conn.execute(
+            'INSERT OR IGNORE INTO finished_games (game_key, player1_id, player2_id, finished_at) VALUES (?, ?, ?, ?)',
+            (game_key, player1_id, player2_id, now)
+        ).rowcount == 1
 
 def update_leaderboard(user_id, first_name, points):
-    try:
-        with sqlite3.connect(LEADERBOARD_DB) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                '''INSERT OR REPLACE INTO leaderboard (user_id, first_name, score)
-                   VALUES (?, ?, COALESCE((SELECT score FROM leaderboard WHERE user_id = ?), 0) + ?)''',
-                (user_id, first_name, user_id, points)
-            )
-            conn.commit()
-    except sqlite3.Error as e:
-        logger.error(f"Error updating leaderboard for user {user_id}: {e}")
+    writer.add_score(user_id, first_name, points)
+    ranking.add_score(user_id, first_name, points)
 
-def get_leaderboard():
-    try:
-        with sqlite3.connect(LEADERBOARD_DB) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT l.first_name, u.username, l.score
-                FROM leaderboard l
-                JOIN users u ON l.user_id = u.user_id
-                ORDER BY l.score DESC LIMIT 5
-            ''')
-            return cursor.fetchall()
-    except sqlite3.Error as e:
-        logger.error(f"Error fetching leaderboard: {e}")
-        return []
+def get_leaderboard(limit=5):
+    return ranking.top(limit)
+
+def get_user_rank(user_id):
+    # (rank, score, total players) or None if the user has no score yet
+    return ranking.rank(user_id)
@@ -0,0 +1,65 @@
+# evaluation.py
+# Static evaluation of non-terminal positions for the search.
+# Works a whole direction at a time: shifting a mask by k*shift lines up the
+# k-th cell of every window on the window's start bit, so one bit-sliced
+# adder counts the stones in all windows of that direction at once.
+from bitboard import COLS, ROWS, H1, DIRECTIONS
+
+THREE_WEIGHT = 5
+TWO_WEIGHT = 2
+CENTER_WEIGHT = 3
+
+# never let a heuristic score look like a proven win or loss
+MAX_EVAL = 900
+
+
+def _start_mask(dc, dh):
+    mask = 0
+    for col in range(COLS):
+        for h in range(ROWS):
+            end_col, end_h = col + 3 * dc, h + 3 * dh
+            if 0 <= end_col < COLS and 0 <= end_h < ROWS:
+                mask |= 1 << (col * H1 + h)
+    return mask
+
+
+# (shift, bits where a window in that direction starts), matching DIRECTIONS
+WINDOW_STARTS = tuple(
+    (shift, _start_mask(dc, dh))
+    for shift, (dc, dh) in zip(DIRECTIONS, ((0, 1), (1, 0), (1, -1), (1, 1)))
+)
+
+CENTER_MASK = ((1 << ROWS) - 1) << (COLS // 2 * H1)
+
+
+def _counts(a, b, c, d):
+    # bit-sliced sum of four bits: returns (windows with 3, windows with 2)
+    s1, s2 = a ^ b, c ^ d
+    ones = s1 ^ s2
+    twos = (a & b) ^ (c & d) ^ (s1 & s2)
+    return ones & twos, twos & ~ones
+
+
+def evaluate(board, slot):
+    # heuristic score for `slot`, positive when `slot` stands better
+    mine, theirs = board.masks[slot], board.masks[slot ^ 1]
+    score = ((mine & CENTER_MASK).bit_count() - (theirs & CENTER_MASK).bit_count()) * CENTER_WEIGHT
+    for shift, starts in WINDOW_STARTS:
+        m1, m2, m3 = mine >> shift, mine >> 2 * shift, mine >> 3 * shift
+        t1, t2, t3 = theirs >> shift, theirs >> 2 * shift, theirs >> 3 * shift
+        # windows holding none of the other side's stones
+        mine_free = starts & ~(theirs | t1 | t2 | t3)
+        theirs_free = starts & ~(mine | m1 | m2 | m3)
+        if mine_free:
+            threes, twos = _counts(mine, m1, m2, m3)
+            score += (mine_free & threes).bit_count() * THREE_WEIGHT
+            score += (mine_free & twos).bit_count() * TWO_WEIGHT
+        if theirs_free:
+            threes, twos = _counts(theirs, t1, t2, t3)
+            score -= (theirs_free & threes).bit_count() * THREE_WEIGHT
+            score -= (theirs_free & twos).bit_count() * TWO_WEIGHT
+    if score > MAX_EVAL:
+        return MAX_EVAL
+    if score < -MAX_EVAL:
+        return -MAX_EVAL
+    return score
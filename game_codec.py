@@ -0,0 +1,94 @@
+# game_codec.py
+# Signed encoding of a whole multiplayer game into callback data, for
+# stateless mode (STATELESS_MULTIPLAYER=1). A token packs the position
+# code, whose turn it is and when it started, the rematch votes, both
+# player ids and a random game key, followed by a truncated HMAC that also
+# covers the message the game is shown in. A forged or moved token fails
+# verification. The token is 54 characters, so "sm_<action>_<token>" fits
+# Telegram's 64-byte callback_data limit.
+import base64
+import hashlib
+import hmac
+import os
+import struct
+from bitboard import position_code, board_from_code
+from game_state import MultiGame
+from config import CALLBACK_SECRET, TOKEN
+
+PREFIX = "sm"
+# position code, flags, player1 id, player2 id, turn start (epoch s), game key
+_PAYLOAD = struct.Struct(">7sBQQI4s")
+_MAC_SIZE = 8
+_TOKEN_BYTES = _PAYLOAD.size + _MAC_SIZE
+
+# flags
+_PLAYER2_TURN = 1
+_PLAYER1_REMATCH = 2
+_PLAYER2_REMATCH = 4
+
+_key = (CALLBACK_SECRET or hashlib.sha256(b"callback-data:" + (TOKEN or "").encode()).hexdigest()).encode()
+
+
+def new_game_key():
+    return os.urandom(4)
+
+
+def _mac(payload, message_key):
+    return hmac.new(_key, payload + message_key.encode(), hashlib.sha256).digest()[:_MAC_SIZE]
+
+
+def encode_game(state, game_key, message_key):
+    # message_key: inline_message_id, or "chat_id:message_id"
+    flags = _PLAYER2_TURN if state.turn == "player2" else 0
+    if state.player1_id in state.rematch:
+        flags |= _PLAYER1_REMATCH
+    if state.player2_id in state.rematch:
+        flags |= _PLAYER2_REMATCH
+    payload = _PAYLOAD.pack(
+        position_code(state.board).to_bytes(7, "big"), flags,
+        state.player1_id, state.player2_id, int(state.last_move_time), game_key
+    )
+    return base64.urlsafe_b64encode(payload + _mac(payload, message_key)).rstrip(b"=").decode()
+
+
+def decode_game(token, message_key):
+    # (MultiGame without names, game key), or None if the token was not
+    # issued for this message
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except ValueError:
+        return None
+    if len(raw) != _TOKEN_BYTES:
+        return None
+    payload, mac = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+    if not hmac.compare_digest(mac, _mac(payload, message_key)):
+        return None
+    code, flags, player1_id, player2_id, turn_started, game_key = _PAYLOAD.unpack(payload)
+    state = MultiGame(player1_id, player2_id, None, None)
+    try:
+        state.board = board_from_code(int.from_bytes(code, "big"))
+    except ValueError:
+        return None
+    state.turn = "player2" if flags & _PLAYER2_TURN else "player1"
+    state.last_move_time = turn_started
+    if flags & _PLAYER1_REMATCH:
+        state.rematch.append(player1_id)
+    if flags & _PLAYER2_REMATCH:
+        state.rematch.append(player2_id)
+    return state, game_key
+
+
+def callback_data(action, token):
+    # action: a column digit, "s" (surrender) or "r" (rematch); board
+    # buttons get the same layout from create_board_markup(prefix=PREFIX)
+    return f"{PREFIX}_{action}_{token}"
+
+
+def is_stateless_data(data):
+    return data.startswith(f"{PREFIX}_")
+
+
+def parse_callback_data(data):
+    # (action, token)
+    action, _, token = data[len(PREFIX) + 1:].partition("_")
+    return action, token
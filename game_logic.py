@@ -1,137 +1,157 @@
 # game_logic.py
+import json
 import random
+import time
 from telebot import types
-
-# game_states will be used by handlers (mirrors original bot.py)
-# structure per game_state matches original: single and multi
-game_states = {}  # {user_id: {...}}
+from bitboard import Board, PIECE_SLOT, ROWS, COLS, CELL_COUNT, has_four, wins_at, bit_index, bit_of
+from search import iterative_deepening, solve
+from opening_book import book_move
+from position_cache import move_cache
+from config import MOVE_TIME_BUDGET, ENDGAME_EMPTY_CELLS
 
 # ---------- board utilities ----------
 def create_board():
-    return [[None for _ in range(7)] for _ in range(7)]
+    return Board()
+
+def is_valid_move(board, col):
+    return 0 <= col < COLS and board.can_play(col)
 
 def drop_piece(board, col, piece):
-    for row in range(6, -1, -1):
-        if board[row][col] is None:
-            board[row][col] = piece
-            return row
-    return None
+    if not board.can_play(col):
+        return None
+    return board.play(col, PIECE_SLOT[piece])
 
 def check_winner(board, piece):
-    # horizontal
-    for row in range(7):
-        for col in range(4):
-            if all(board[row][col + i] == piece for i in range(4)):
-                return True
-    # vertical
-    for row in range(4):
-        for col in range(7):
-            if all(board[row + i][col] == piece for i in range(4)):
-                return True
-    # diag positive
-    for row in range(4):
-        for col in range(4):
-            if all(board[row + i][col + i] == piece for i in range(4)):
-                return True
-    # diag negative
-    for row in range(3, 7):
-        for col in range(4):
-            if all(board[row - i][col + i] == piece for i in range(4)):
-                return True
-    return False
+    return has_four(board.masks[PIECE_SLOT[piece]])
+
+def check_winner_at(board, row, col, piece):
+    # only looks at the lines through the cell that was just filled
+    return wins_at(board.masks[PIECE_SLOT[piece]], bit_index(row, col))
 
 def check_draw(board):
-    for row in board:
-        if None in row:
-            return False
-    return True
+    return board.is_full()
+
+# ---------- rendering ----------
+# Rendering is a pure function of the board and a row has at most 3**7
+# states, so each row's text and keyboard JSON is built once and shared by
+# every game; a board is assembled from its rows' cached fragments.
+EMOJI = {0: "🔵", 1: "🔴", None: "⬜"}
+ROW_MASKS = [sum(bit_of(row, col) for col in range(COLS)) for row in range(ROWS)]
+_text_rows = {}    # {(row, slot 0 bits, slot 1 bits): row text}
+_markup_rows = {}  # {(prefix, row, slot 0 bits, slot 1 bits): (buttons, row JSON)}
+
+def _row_cells(row, bits0, bits1):
+    cells = []
+    for col in range(COLS):
+        bit = bit_of(row, col)
+        cells.append(0 if bits0 & bit else 1 if bits1 & bit else None)
+    return cells
+
+def _text_row(row, bits0, bits1):
+    key = (row, bits0, bits1)
+    text = _text_rows.get(key)
+    if text is None:
+        text = _text_rows[key] = "".join(EMOJI[cell] for cell in _row_cells(row, bits0, bits1)) + "\n"
+    return text
+
+def _build_markup_row(prefix, row, bits0, bits1, token=None):
+    suffix = f"_{token}" if token else ""
+    buttons = []
+    for col, cell in enumerate(_row_cells(row, bits0, bits1)):
+        if row == 0 and cell is None:
+            buttons.append(types.InlineKeyboardButton("⬇️", callback_data=f"{prefix}_{col}{suffix}"))
+        else:
+            buttons.append(types.InlineKeyboardButton(EMOJI[cell], callback_data="invalid_click"))
+    return tuple(buttons), json.dumps([button.to_dict() for button in buttons])
+
+def _markup_row(prefix, row, bits0, bits1):
+    # only the top row's buttons carry the prefix, so lower rows are shared
+    # by every prefix and the cache stays bounded by the row patterns
+    key = (prefix, row, bits0, bits1) if row == 0 else (row, bits0, bits1)
+    entry = _markup_rows.get(key)
+    if entry is None:
+        entry = _markup_rows[key] = _build_markup_row(prefix, row, bits0, bits1)
+    return entry
+
+class BoardMarkup(types.InlineKeyboardMarkup):
+    # board rows serialize from their cached JSON; rows added afterwards
+    # (e.g. the surrender button) are serialized as usual
+    def __init__(self, rows):
+        super().__init__(row_width=COLS)
+        self.inline_keyboard = [list(buttons) for buttons, _ in rows]
+        self._fragments = [fragment for _, fragment in rows]
+
+    def to_json(self):
+        fragments = self._fragments + [
+            json.dumps([button.to_dict() for button in row])
+            for row in self.inline_keyboard[len(self._fragments):]
+        ]
+        return '{"inline_keyboard": [' + ", ".join(fragments) + "]}"
 
 def render_board(board):
-    board_str = ""
-    for row in board:
-        board_str += "".join(["🔵" if cell == "player" else "🔴" if cell == "bot" else "⬜" for cell in row]) + "\n"
-    return board_str
+    m0, m1 = board.masks
+    return "".join(_text_row(row, m0 & mask, m1 & mask) for row, mask in enumerate(ROW_MASKS))
 
 def render_multi_board(board):
-    board_str = ""
-    for row in board:
-        board_str += "".join(["🔵" if cell == "player1" else "🔴" if cell == "player2" else "⬜" for cell in row]) + "\n"
-    return board_str
-
-def create_board_markup(board, prefix="move"):
-    markup = types.InlineKeyboardMarkup(row_width=7)
-    for row in range(7):
-        row_buttons = []
-        for col in range(7):
-            emoji = "🔵" if board[row][col] in ["player", "player1"] else "🔴" if board[row][col] in ["bot", "player2"] else "⬜"
-            if row == 0 and board[row][col] is None:
-                row_buttons.append(types.InlineKeyboardButton("⬇️", callback_data=f"{prefix}_{col}"))
-            else:
-                row_buttons.append(types.InlineKeyboardButton(emoji, callback_data="invalid_click"))
-        markup.add(*row_buttons)
-    return markup
+    # same colours as single mode: slot 0 is player1, slot 1 is player2
+    return render_board(board)
+
+def create_board_markup(board, prefix="move", token=None):
+    # with a token (stateless multiplayer game) the top row's buttons carry
+    # it, so only that row is built per board
+    m0, m1 = board.masks
+    rows = [
+        _build_markup_row(prefix, row, m0 & mask, m1 & mask, token) if row == 0 and token
+        else _markup_row(prefix, row, m0 & mask, m1 & mask)
+        for row, mask in enumerate(ROW_MASKS)
+    ]
+    return BoardMarkup(rows)
 
 # ---------- bot AI ----------
+BOT = PIECE_SLOT["bot"]
+PLAYER = PIECE_SLOT["player"]
+
 def bot_move(board, difficulty):
-    valid_moves = [col for col in range(7) if board[0][col] is None]
+    valid_moves = board.valid_moves()
     if not valid_moves:
         return None
     if difficulty == "easy":
         return random.choice(valid_moves)
     elif difficulty == "medium":
-        # try win
-        for col in valid_moves:
-            temp_board = [r[:] for r in board]
-            row = drop_piece(temp_board, col, "bot")
-            if row is not None and check_winner(temp_board, "bot"):
-                return col
-        # try block
-        for col in valid_moves:
-            temp_board = [r[:] for r in board]
-            row = drop_piece(temp_board, col, "player")
-            if row is not None and check_winner(temp_board, "player"):
-                return col
-        return random.choice(valid_moves)
+        cached = move_cache.get(board, "medium")
+        if cached is not None:
+            col = cached[0]
+        else:
+            col = winning_or_blocking_move(board, valid_moves)
+            move_cache.put(board, "medium", col)
+        return col if col is not None else random.choice(valid_moves)
     else:  # hard
-        best_score = float('-inf')
-        best_col = random.choice(valid_moves)
+        col = book_move(board)
+        if col is not None:
+            return col
+        cached = move_cache.get(board, "hard")
+        if cached is not None:
+            return cached[0]
+        result = None
+        started = time.monotonic()
+        if CELL_COUNT - board.moves <= ENDGAME_EMPTY_CELLS:
+            result = solve(board, BOT, MOVE_TIME_BUDGET["hard"])
+        if result is None:
+            # a solver that ran out of time leaves the fallback what is left
+            # of the budget; depth 1 always completes, so it still has a move
+            remaining = MOVE_TIME_BUDGET["hard"] - (time.monotonic() - started)
+            result = iterative_deepening(board, BOT, max(0.0, remaining))
+        col, score = result
+        move_cache.put(board, "hard", col, score)
+        return col
+
+def winning_or_blocking_move(board, valid_moves):
+    # try win, then try block
+    for slot in (BOT, PLAYER):
         for col in valid_moves:
-            temp_board = [r[:] for r in board]
-            row = drop_piece(temp_board, col, "bot")
-            if row is not None:
-                score = minimax(temp_board, 5, False)
-                if score > best_score:
-                    best_score = score
-                    best_col = col
-        return best_col
-
-def minimax(board, depth, is_maximizing):
-    if check_winner(board, "bot"):
-        return 100
-    if check_winner(board, "player"):
-        return -100
-    if depth == 0 or all(board[0][col] is not None for col in range(7)):
-        return 0
-    if is_maximizing:
-        best_score = float('-inf')
-        for col in range(7):
-            if board[0][col] is None:
-                temp = [r[:] for r in board]
-                drop_piece(temp, col, "bot")
-                score = minimax(temp, depth - 1, False)
-                if score > best_score:
-                    best_score = score
-        return best_score
-    else:
-        best_score = float('inf')
-        for col in range(7):
-            if board[0][col] is None:
-                temp = [r[:] for r in board]
-                drop_piece(temp, col, "player")
-                score = minimax(temp, depth - 1, True)
-                if score < best_score:
-                    best_score = score
-        return best_score
+            if board.is_winning_move(col, slot):
+                return col
+    return None
 
 def end_game_markup():
     markup = types.InlineKeyboardMarkup()
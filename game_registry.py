@@ -0,0 +1,127 @@
+# game_registry.py
+# Every live game goes through here. Besides game_states it keeps indexes
+# from inline message id and chat message to the game id, so a click is
+# routed without scanning all games. Multiplayer games that ended with a
+# rematch button are kept for the rematch until both players vote or the
+# sweeper drops them.
+#
+# Single-player games are keyed by the user's id. Multiplayer games get
+# their own id from new_multi_game_id(), so a player can have a single game
+# and a multiplayer game at the same time.
+import threading
+import uuid
+
+game_states = {}  # {game_id: SingleGame | MultiGame}
+_inline_games = {}  # {inline_message_id: multi game_id}
+_message_games = {}  # {(chat_id, message_id): multi game_id}
+_rematch_games = {}  # {game_id: finished MultiGame}
+_lock = threading.RLock()
+
+
+def new_multi_game_id():
+    return uuid.uuid4().hex[:12]
+
+
+def get_game(game_id):
+    return game_states.get(game_id)
+
+
+def get_single_game(user_id):
+    state = game_states.get(user_id)
+    if state is None or state.mode != "single":
+        return None
+    return state
+
+
+def find_multi_game(inline_message_id=None, message=None):
+    # (game_id, state) of the multiplayer game shown on the clicked message,
+    # or (None, None); `message` is (chat_id, message_id) for a chat message
+    with _lock:
+        if inline_message_id:
+            game_id = _inline_games.get(inline_message_id)
+        else:
+            game_id = _message_games.get(message)
+        state = game_states.get(game_id) if game_id is not None else None
+        if state is None:
+            return None, None
+        return game_id, state
+
+
+def add_game(game_id, state):
+    with _lock:
+        old = game_states.get(game_id)
+        if old is not None:
+            _unindex(game_id, old)
+        game_states[game_id] = state
+        if state.mode == "multi":
+            if state.inline_message_id:
+                _inline_games[state.inline_message_id] = game_id
+            if state.chat_id and state.message_id:
+                _message_games[(state.chat_id, state.message_id)] = game_id
+
+
+def add_message_game(game_id, state):
+    # add a multiplayer game unless its message already shows one (a second
+    # click on the same invite); returns whether it was added
+    with _lock:
+        if state.inline_message_id:
+            existing = _inline_games.get(state.inline_message_id)
+        else:
+            existing = _message_games.get((state.chat_id, state.message_id))
+        if existing is not None and existing in game_states:
+            return False
+        add_game(game_id, state)
+        return True
+
+
+def remove_game(game_id, state=None):
+    # with `state`, only remove the game if it is still that exact object
+    with _lock:
+        current = game_states.get(game_id)
+        if current is None or (state is not None and current is not state):
+            return False
+        del game_states[game_id]
+        _unindex(game_id, current)
+        return True
+
+
+def get_rematch_game(game_id):
+    return _rematch_games.get(game_id)
+
+
+def keep_for_rematch(game_id, state):
+    with _lock:
+        _rematch_games[game_id] = state
+
+
+def pop_rematch_game(game_id, state):
+    # True for the one caller that gets to start the rematch
+    with _lock:
+        if _rematch_games.get(game_id) is not state:
+            return False
+        del _rematch_games[game_id]
+        return True
+
+
+def pop_idle_games(ttl, now):
+    # remove and return [(game_id, state)] for games idle longer than ttl
+    # seconds; unanswered rematch offers are dropped silently
+    with _lock:
+        idle = [(game_id, state) for game_id, state in game_states.items() if now - state.last_active > ttl]
+        for game_id, state in idle:
+            del game_states[game_id]
+            _unindex(game_id, state)
+        for game_id in [game_id for game_id, state in _rematch_games.items() if now - state.last_active > ttl]:
+            del _rematch_games[game_id]
+    return idle
+
+
+def _unindex(game_id, state):
+    if state.mode != "multi":
+        return
+    inline_message_id = state.inline_message_id
+    if inline_message_id and _inline_games.get(inline_message_id) == game_id:
+        del _inline_games[inline_message_id]
+    message = (state.chat_id, state.message_id)
+    if _message_games.get(message) == game_id:
+        del _message_games[message]
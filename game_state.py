@@ -0,0 +1,55 @@
+# game_state.py
+# Per-game state objects stored in game_registry.game_states. __slots__
+# keeps each live game to a handful of fields; the board itself is a
+# bitboard.Board (two integer masks and the column heights).
+import threading
+from time import time
+from game_logic import create_board
+
+
+class SingleGame:
+    __slots__ = ("board", "turn", "difficulty", "user_name", "message_id", "chat_id", "last_active", "lock")
+    mode = "single"
+
+    def __init__(self, user_name, chat_id, difficulty):
+        self.board = create_board()
+        self.turn = "player"
+        self.difficulty = difficulty
+        self.user_name = user_name
+        self.message_id = None
+        self.chat_id = chat_id
+        self.last_active = time()
+        # held while a click or the bot's move checks and changes the turn
+        self.lock = threading.Lock()
+
+    def touch(self):
+        self.last_active = time()
+
+
+class MultiGame:
+    __slots__ = (
+        "board", "turn", "player1_id", "player2_id", "player1_name", "player2_name",
+        "last_move_time", "missed_turns", "message_id", "chat_id", "inline_message_id", "rematch", "last_active", "lock",
+    )
+    mode = "multi"
+
+    def __init__(self, player1_id, player2_id, player1_name, player2_name,
+                 message_id=None, chat_id=None, inline_message_id=None):
+        self.board = create_board()
+        self.turn = "player1"
+        self.player1_id = player1_id
+        self.player2_id = player2_id
+        self.player1_name = player1_name
+        self.player2_name = player2_name
+        self.last_move_time = time()
+        self.missed_turns = [0, 0]  # turns in a row each player let time out
+        self.message_id = message_id
+        self.chat_id = chat_id
+        self.inline_message_id = inline_message_id
+        self.rematch = []
+        self.last_active = self.last_move_time
+        # held while a click or the turn timer checks and changes the turn
+        self.lock = threading.Lock()
+
+    def touch(self):
+        self.last_active = time()
@@ -0,0 +1,230 @@
+# handlers/async_callbacks.py
+# Coroutine versions of handlers/callbacks.py for AsyncTeleBot. The game
+# rules are shared with it through handlers/games.py and handlers/stateless.py,
+# and edits go through the same outbox.
+import asyncio
+import sqlite3
+from config import ADMIN_USER_IDS, STATELESS_MULTIPLAYER
+from database import get_user_first_name
+from ai_pool import bot_move_async
+from broadcast import start_broadcast
+from outbox import outbox
+from game_codec import is_stateless_data
+from utils import is_message_valid, check_rate_limit
+from handlers.views import (
+    DIFFICULTY_PROMPT, MAIN_MENU_TEXT, BROADCAST_PROMPT, NOT_STARTED_TEXT, ERROR_TEXT, RATE_LIMITED_TITLE,
+    GAME_STARTED_TEXT, main_menu_markup, difficulty_markup, article, invite_results
+)
+from handlers import games, stateless
+from config import logger
+
+def register_callbacks(bot, sync_bot):
+    # sync_bot: plain TeleBot used by the broadcast threads
+
+    # admin chats whose next message is a broadcast (AsyncTeleBot has no
+    # next-step handlers)
+    awaiting_broadcast = set()
+
+    # --- broadcast flow (admin) ---
+    @bot.message_handler(func=lambda message: message.chat.id in awaiting_broadcast)
+    async def send_broadcast(message):
+        try:
+            awaiting_broadcast.discard(message.chat.id)
+            if not is_message_valid(message):
+                return
+            user_id = message.chat.id
+            if user_id not in ADMIN_USER_IDS:
+                await bot.send_message(user_id, "فقط ادمین‌ها می‌تونن پیام همگانی ارسال کنن.")
+                return
+            try:
+                # sent in the background; progress is reported to this chat
+                await asyncio.to_thread(start_broadcast, sync_bot, user_id, message.text)
+            except sqlite3.Error as e:
+                logger.error(f"Error accessing users database for broadcast: {e}")
+                await bot.send_message(user_id, "خطا در دسترسی به دیتابیس.")
+        except Exception as e:
+            logger.error(f"Error in send_broadcast: {e}")
+
+    @bot.callback_query_handler(func=lambda call: call.data == "broadcast")
+    async def handle_broadcast(call):
+        try:
+            user_id = call.from_user.id
+            chat_id = call.message.chat.id if call.message else call.from_user.id
+            if user_id not in ADMIN_USER_IDS:
+                await bot.answer_callback_query(call.id, "این قابلیت فقط برای ادمین‌ها در دسترسه! 😕")
+                return
+            outbox.edit_message_text(BROADCAST_PROMPT, chat_id, call.message.message_id)
+            awaiting_broadcast.add(chat_id)
+        except Exception as e:
+            logger.error(f"Error in handle_broadcast: {e}")
+
+    # --- invalid click (for non-top-row buttons) ---
+    @bot.callback_query_handler(func=lambda call: call.data == "invalid_click")
+    async def handle_invalid_click(call):
+        try:
+            await bot.answer_callback_query(call.id, "برای انداختن مهره، روی دکمه‌های ردیف اول ضربه بزنید! 😉")
+        except Exception as e:
+            logger.error(f"Error in handle_invalid_click: {e}")
+
+    # --- start game (difficulty selection) ---
+    @bot.callback_query_handler(func=lambda call: call.data == "start_game")
+    async def start_game(call):
+        try:
+            user_id = call.from_user.id
+            allowed, err = check_rate_limit(user_id)
+            if not allowed:
+                await bot.answer_callback_query(call.id, err)
+                return
+            outbox.edit_message_text(DIFFICULTY_PROMPT, call.message.chat.id, call.message.message_id, reply_markup=difficulty_markup())
+        except Exception as e:
+            logger.error(f"Error in start_game: {e}")
+
+    @bot.callback_query_handler(func=lambda call: call.data in ["difficulty_easy", "difficulty_medium", "difficulty_hard"])
+    async def handle_difficulty_selection(call):
+        try:
+            user_id = call.from_user.id
+            allowed, err = check_rate_limit(user_id)
+            if not allowed:
+                await bot.answer_callback_query(call.id, err)
+                return
+            difficulty = call.data[len("difficulty_"):]
+            await send_board(games.start_single_game(user_id, call.from_user.first_name, call.message.chat.id, difficulty))
+        except Exception as e:
+            logger.error(f"Error in handle_difficulty_selection: {e}")
+
+    # --- handle single-player move callbacks and surrender ---
+    @bot.callback_query_handler(func=lambda call: call.data.startswith("move_") or call.data == "surrender" or call.data.startswith("surrender_"))
+    async def handle_single_move(call):
+        try:
+            user_id = call.from_user.id
+            answer, board, state = games.single_click(user_id, call.data)
+            if answer:
+                await bot.answer_callback_query(call.id, answer)
+            await send_board(board)
+            if state is None:
+                return
+            # the search runs in the AI pool; clicks are rejected until it lands
+            try:
+                col = await bot_move_async(state.board, state.difficulty)
+            except Exception:
+                await send_board(games.restore_player_turn(user_id, state))
+                return
+            await send_board(games.apply_bot_move(user_id, state, col))
+        except Exception as e:
+            logger.error(f"Error in handle_single_move: {e}")
+
+    # --- end game buttons (new_game / main_menu) ---
+    @bot.callback_query_handler(func=lambda call: call.data in ["new_game", "main_menu"])
+    async def handle_end_game(call):
+        try:
+            user_id = call.from_user.id
+            if call.data == "new_game":
+                outbox.edit_message_text(DIFFICULTY_PROMPT, call.message.chat.id, call.message.message_id, reply_markup=difficulty_markup())
+            else:
+                outbox.edit_message_text(MAIN_MENU_TEXT, call.message.chat.id, call.message.message_id, reply_markup=main_menu_markup(user_id))
+        except Exception as e:
+            logger.error(f"Error in handle_end_game: {e}")
+
+    # --- inline handler start (for multiplayer prompt) ---
+    @bot.inline_handler(lambda query: query.query == "")
+    async def inline_query(query):
+        try:
+            user_id = query.from_user.id
+            allowed, limit_message = check_rate_limit(user_id, "inline")
+            if not allowed:
+                await bot.answer_inline_query(query.id, [article(RATE_LIMITED_TITLE, limit_message)], cache_time=1)
+                return
+            # users seen recently come from the cache, the rest from SQLite in a thread
+            user_name = await asyncio.to_thread(get_user_first_name, user_id)
+            if user_name is None:
+                results = [article("ربات رو استارت نکردی ! برای جزئیات کلیک کن", NOT_STARTED_TEXT)]
+                await bot.answer_inline_query(query.id, results, cache_time=1)
+                return
+            await bot.answer_inline_query(query.id, invite_results(user_id, user_name), cache_time=0)
+        except Exception as e:
+            logger.error(f"Error in inline_query: {e}")
+            await bot.answer_inline_query(query.id, [article("خطا", ERROR_TEXT)], cache_time=1)
+
+    # --- join game (from inline) ---
+    @bot.callback_query_handler(func=lambda call: call.data.startswith("join_"))
+    async def join_game(call):
+        try:
+            challenger_id = int(call.data.split("_")[1])
+            opponent_id = call.from_user.id
+
+            if opponent_id == challenger_id:
+                await bot.answer_callback_query(call.id, "نمی‌تونی با خودت بازی کنی! 😅")
+                return
+
+            challenger_name = await asyncio.to_thread(get_user_first_name, challenger_id)
+            if challenger_name is None:
+                await bot.answer_callback_query(call.id, "کاربر شروع‌کننده پیدا نشد! لطفاً دوباره امتحان کن.")
+                return
+
+            if await asyncio.to_thread(get_user_first_name, opponent_id) is None:
+                await bot.answer_callback_query(call.id, NOT_STARTED_TEXT)
+                return
+
+            if STATELESS_MULTIPLAYER:
+                text, markup = await asyncio.to_thread(
+                    stateless.new_game, challenger_id, opponent_id, stateless.message_key(call)
+                )
+                await bot.answer_callback_query(call.id, GAME_STARTED_TEXT)
+                games.edit_clicked_message(call, text, markup)
+                return
+
+            answer, board = games.join_game(challenger_id, opponent_id, challenger_name, call.from_user.first_name, call)
+            if answer:
+                await bot.answer_callback_query(call.id, answer)
+            await send_board(board)
+        except Exception as e:
+            logger.error(f"Error in join_game: {e}")
+            await bot.answer_callback_query(call.id, ERROR_TEXT)
+
+    # --- multiplayer move handlers (and surrender) ---
+    @bot.callback_query_handler(func=lambda call: call.data.startswith("multi_move_") or call.data == "multi_surrender" or call.data.startswith("multi_surrender_"))
+    async def handle_multi_move(call):
+        try:
+            answer, board = games.multi_click(call.from_user.id, call.from_user.first_name, call)
+            if answer:
+                await bot.answer_callback_query(call.id, answer)
+            await send_board(board)
+        except Exception as e:
+            logger.error(f"Error in handle_multi_move: {e}")
+
+    # --- stateless multiplayer clicks (the game comes from the callback data) ---
+    @bot.callback_query_handler(func=lambda call: is_stateless_data(call.data))
+    async def handle_stateless_click(call):
+        try:
+            answer, text, markup = await asyncio.to_thread(
+                stateless.handle_click,
+                call.data, call.from_user.id, stateless.message_key(call)
+            )
+            if answer:
+                await bot.answer_callback_query(call.id, answer)
+            if text:
+                games.edit_clicked_message(call, text, markup)
+        except Exception as e:
+            logger.error(f"Error in handle_stateless_click: {e}")
+
+    # --- rematch handler ---
+    @bot.callback_query_handler(func=lambda call: call.data.startswith("rematch_"))
+    async def handle_rematch(call):
+        try:
+            answer, board = games.rematch_click(call.from_user.id, call.data[len("rematch_"):], call)
+            if answer:
+                await bot.answer_callback_query(call.id, answer)
+            await send_board(board)
+        except Exception as e:
+            logger.error(f"Error in handle_rematch: {e}")
+
+    async def send_board(board):
+        # first message of a game that has none yet (see handlers/games.py);
+        # never re-send: a second board message would duplicate the game
+        if board is None:
+            return
+        state, text, markup = board
+        try:
+            state.message_id = (await bot.send_message(state.chat_id, text, reply_markup=markup, parse_mode="Markdown")).message_id
+        except Exception as e:
+            logger.error(f"Error sending board message: {e}")
@@ -0,0 +1,74 @@
+# handlers/async_commands.py
+# Coroutine versions of handlers/commands.py for AsyncTeleBot.
+from config import ADMIN_USER_IDS
+from database import save_user, get_leaderboard, get_user_rank
+from utils import is_message_valid, check_rate_limit
+from handlers.views import welcome_message, main_menu_markup, HELP_MESSAGE, leaderboard_message, rank_message
+from handlers.commands import admin_stats_message
+from config import logger
+
+def register_commands(bot):
+    async def rate_limited(message):
+        allowed, error_message = check_rate_limit(message.from_user.id)
+        if not allowed:
+            await bot.send_message(message.from_user.id, error_message)
+        return not allowed
+
+    @bot.message_handler(commands=['start'])
+    async def start_command(message):
+        try:
+            if not is_message_valid(message) or await rate_limited(message):
+                return
+            user_id = message.from_user.id
+            user_name = message.from_user.first_name
+            # buffered by the write-behind queue, never blocks on SQLite
+            save_user(user_id, message.from_user.username, user_name, ADMIN_USER_IDS)
+            await bot.send_message(message.chat.id, welcome_message(user_name), parse_mode="Markdown", reply_markup=main_menu_markup(user_id))
+        except Exception as e:
+            logger.error(f"Error in start_command: {e}")
+
+    @bot.message_handler(commands=['help'])
+    async def help_command(message):
+        try:
+            if not is_message_valid(message) or await rate_limited(message):
+                return
+            await bot.send_message(message.chat.id, HELP_MESSAGE, parse_mode="Markdown")
+        except Exception as e:
+            logger.error(f"Error in help_command: {e}")
+
+    @bot.message_handler(commands=['alive'])
+    async def alive_command(message):
+        try:
+            if not is_message_valid(message) or await rate_limited(message):
+                return
+            await bot.send_message(message.chat.id, "من زنده‌ام و آماده بازی! 🤖 ۴ در یک ردیف منتظرته!")
+        except Exception as e:
+            logger.error(f"Error in alive_command: {e}")
+
+    @bot.message_handler(commands=['leaderboard'])
+    async def leaderboard_command(message):
+        try:
+            if not is_message_valid(message) or await rate_limited(message):
+                return
+            await bot.send_message(message.from_user.id, leaderboard_message(get_leaderboard()))
+        except Exception as e:
+            logger.error(f"Error in leaderboard_command: {e}")
+
+    @bot.message_handler(commands=['rank'])
+    async def rank_command(message):
+        try:
+            if not is_message_valid(message) or await rate_limited(message):
+                return
+            await bot.send_message(message.chat.id, rank_message(get_user_rank(message.from_user.id)))
+        except Exception as e:
+            logger.error(f"Error in rank_command: {e}")
+
+    @bot.message_handler(commands=['stats'])
+    async def stats_command(message):
+        # admins only
+        try:
+            if not is_message_valid(message) or message.from_user.id not in ADMIN_USER_IDS:
+                return
+            await bot.send_message(message.chat.id, admin_stats_message())
+        except Exception as e:
+            logger.error(f"Error in stats_command: {e}")
@@ -0,0 +1,25 @@
+# handlers/async_inline.py
+# Coroutine version of handlers/inline.py for AsyncTeleBot.
+import asyncio
+from database import get_user_first_name
+from config import logger
+from utils import check_rate_limit
+from handlers.views import RATE_LIMITED_TITLE, article, invite_results
+from handlers.inline import INLINE_NOT_STARTED_TEXT
+
+def register_inline(bot):
+    @bot.inline_handler(lambda query: query.query == "")
+    async def inline_start(query):
+        try:
+            user_id = query.from_user.id
+            allowed, limit_message = check_rate_limit(user_id, "inline")
+            if not allowed:
+                await bot.answer_inline_query(query.id, [article(RATE_LIMITED_TITLE, limit_message)], cache_time=1)
+                return
+            user_name = await asyncio.to_thread(get_user_first_name, user_id)
+            if user_name is None:
+                await bot.answer_inline_query(query.id, [article("خطا", INLINE_NOT_STARTED_TEXT)], cache_time=1)
+                return
+            await bot.answer_inline_query(query.id, invite_results(user_id, user_name), cache_time=0)
+        except Exception as e:
+            logger.error(f"Error in inline_start: {e}")
@@ -1,17 +1,18 @@
 # handlers/callbacks.py
-from telebot import types
-from config import ADMIN_USER_IDS
-from database import update_leaderboard, save_user
-from game_logic import (
-    game_states, create_board, create_board_markup, render_board, render_multi_board,
-    drop_piece, check_winner, check_draw, bot_move, end_game_markup
-)
+from config import ADMIN_USER_IDS, STATELESS_MULTIPLAYER
+from database import get_user_first_name
+from ai_pool import submit_bot_move
+from broadcast import start_broadcast
+from outbox import outbox
+from game_codec import is_stateless_data
 from utils import is_message_valid, check_rate_limit
+from handlers.views import (
+    DIFFICULTY_PROMPT, MAIN_MENU_TEXT, BROADCAST_PROMPT, NOT_STARTED_TEXT, ERROR_TEXT, RATE_LIMITED_TITLE,
+    GAME_STARTED_TEXT, main_menu_markup, difficulty_markup, article, invite_results
+)
+from handlers import games, stateless
 from config import logger
 import sqlite3
-from database import USER_DB
-from time import sleep, time
-import uuid
 
 def register_callbacks(bot):
 
@@ -25,24 +26,11 @@ def register_callbacks(bot):
                 bot.send_message(user_id, "فقط ادمین‌ها می‌تونن پیام همگانی ارسال کنن.")
                 return
             try:
-                with sqlite3.connect(USER_DB) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('SELECT user_id FROM users')
-                    users = cursor.fetchall()
+                # sent in the background; progress is reported to this chat
+                start_broadcast(bot, user_id, message.text)
             except sqlite3.Error as e:
                 logger.error(f"Error accessing users database for broadcast: {e}")
                 bot.send_message(user_id, "خطا در دسترسی به دیتابیس.")
-                return
-
-            success_count = 0
-            for u in users:
-                try:
-                    bot.send_message(u[0], message.text)
-                    success_count += 1
-                    sleep(0.5)
-                except Exception:
-                    continue
-            bot.send_message(user_id, f"پیام به {success_count} کاربر ارسال شد 📢")
         except Exception as e:
             logger.error(f"Error in send_broadcast: {e}")
 
@@ -54,7 +42,7 @@ def register_callbacks(bot):
             if user_id not in ADMIN_USER_IDS:
                 bot.answer_callback_query(call.id, "این قابلیت فقط برای ادمین‌ها در دسترسه! 😕")
                 return
-            bot.edit_message_text("هر پیامی که می‌خوای بنویس تا برای همه کاربران ارسال بشه 📢", chat_id, call.message.message_id)
+            outbox.edit_message_text(BROADCAST_PROMPT, chat_id, call.message.message_id)
             bot.register_next_step_handler_by_chat_id(chat_id, send_broadcast)
         except Exception as e:
             logger.error(f"Error in handle_broadcast: {e}")
@@ -76,11 +64,7 @@ def register_callbacks(bot):
             if not allowed:
                 bot.answer_callback_query(call.id, err)
                 return
-            markup = types.InlineKeyboardMarkup()
-            markup.add(types.InlineKeyboardButton("آسون 😊 (همینجوری الکی فقط مهره میندازه)", callback_data="difficulty_easy"))
-            markup.add(types.InlineKeyboardButton("متوسط 😎 (با استدلال های ساده بازی رو جلو میبره)", callback_data="difficulty_medium"))
-            markup.add(types.InlineKeyboardButton("سخت 😈 (بردن این سختی ، کار هر کسی نیست)", callback_data="difficulty_hard"))
-            bot.edit_message_text("سطح سختی رو انتخاب کن: 🎯", call.message.chat.id, call.message.message_id, reply_markup=markup)
+            outbox.edit_message_text(DIFFICULTY_PROMPT, call.message.chat.id, call.message.message_id, reply_markup=difficulty_markup())
         except Exception as e:
             logger.error(f"Error in start_game: {e}")
 
@@ -92,23 +76,8 @@ def register_callbacks(bot):
             if not allowed:
                 bot.answer_callback_query(call.id, err)
                 return
-            difficulty_map = {
-                "difficulty_easy": "easy",
-                "difficulty_medium": "medium",
-                "difficulty_hard": "hard"
-            }
-            difficulty = difficulty_map[call.data]
-            user_name = call.from_user.first_name
-            game_states[user_id] = {
-                "mode": "single",
-                "board": create_board(),
-                "turn": "player",
-                "difficulty": difficulty,
-                "user_name": user_name,
-                "message_id": None,
-                "chat_id": call.message.chat.id
-            }
-            update_single_board(bot, user_id)
+            difficulty = call.data[len("difficulty_"):]
+            send_board(games.start_single_game(user_id, call.from_user.first_name, call.message.chat.id, difficulty))
         except Exception as e:
             logger.error(f"Error in handle_difficulty_selection: {e}")
 
@@ -117,100 +86,31 @@ def register_callbacks(bot):
     def handle_single_move(call):
         try:
             user_id = call.from_user.id
-            if user_id not in game_states or game_states[user_id]["mode"] != "single":
-                bot.answer_callback_query(call.id, "بازی فعالی وجود نداره! /start رو بزن.")
-                return
-            state = game_states[user_id]
-
-            # surrender flow
-            if call.data == "surrender":
-                markup = types.InlineKeyboardMarkup()
-                markup.add(types.InlineKeyboardButton("آره 😔", callback_data=f"surrender_yes_{user_id}"))
-                markup.add(types.InlineKeyboardButton("نه، پشیمون شدم! 😅", callback_data=f"surrender_no_{user_id}"))
-                bot.edit_message_text("مطمئنی می‌خوای تسلیم بشی؟ 🏳️", state["chat_id"], state["message_id"], reply_markup=markup)
-                return
-
-            if call.data.startswith("surrender_yes_"):
-                bot.edit_message_text(f"تو تسلیم شدی! 🏳️", state["chat_id"], state["message_id"], reply_markup=end_game_markup())
-                del game_states[user_id]
-                return
-
-            if call.data.startswith("surrender_no_"):
-                update_single_board(bot, user_id)
-                return
-
-            # check turn
-            if state["turn"] != "player":
-                bot.answer_callback_query(call.id, "نوبتت نیست، صبر کن! ⏳")
-                return
-
-            allowed, err = check_rate_limit(user_id)
-            if not allowed:
-                bot.answer_callback_query(call.id, err)
-                return
-
-            col = int(call.data.split("_")[1])
-            if state["board"][0][col] is not None:
-                bot.answer_callback_query(call.id, "این ستون پره! یه ستون دیگه انتخاب کن. 😕")
-                return
-
-            row = drop_piece(state["board"], col, "player")
-            board = state["board"]
-            if row is not None:
-                if check_winner(state["board"], "player"):
-                    points = {"easy": 1, "medium": 3, "hard": 10}[state["difficulty"]]
-                    update_leaderboard(user_id, state["user_name"], points)
-                    bot.edit_message_text(
-                        f"تو برنده شدی! 🎉 {points} امتیاز گرفتی\n\n{render_board(board)}",
-                        state["chat_id"],
-                        state["message_id"],
-                        reply_markup=end_game_markup()
-                    )
-                    del game_states[user_id]
-                    return
-
-                if check_draw(state["board"]):
-                    bot.edit_message_text(
-                        f"بازی بدون برنده به پایان رسید! 🤝\n\n {render_board(board)}",
-                        state["chat_id"],
-                        state["message_id"],
-                        reply_markup=end_game_markup()
-                    )
-                    del game_states[user_id]
-                    return
-
-                state["turn"] = "bot"
-                update_single_board(bot, user_id)
-
-                # bot move
-                col = bot_move(state["board"], state["difficulty"])
-                board = state["board"]
-                if col is not None:
-                    drop_piece(state["board"], col, "bot")
-                    state["turn"] = "player"
-                    if check_winner(state["board"], "bot"):
-                        bot.edit_message_text(
-                            f"ربات برنده شد! 😢\n\n{render_board(board)}",
-                            state["chat_id"],
-                            state["message_id"],
-                            reply_markup=end_game_markup()
-                        )
-                        del game_states[user_id]
-                        return
+            answer, board, state = games.single_click(user_id, call.data)
+            if answer:
+                bot.answer_callback_query(call.id, answer)
+            send_board(board)
+            if state is not None:
+                # bot move runs in the AI pool; clicks are rejected until it lands
+                submit_bot_move(
+                    state.board, state.difficulty,
+                    lambda col: apply_bot_move(user_id, state, col),
+                    lambda e: restore_player_turn(user_id, state)
+                )
+        except Exception as e:
+            logger.error(f"Error in handle_single_move: {e}")
 
-                    if check_draw(state["board"]):
-                        bot.edit_message_text(
-                            f"بازی بدون برنده به پایان رسید! 🤝\n\n {render_board(board)}",
-                            state["chat_id"],
-                            state["message_id"],
-                            reply_markup=end_game_markup()
-                        )
-                        del game_states[user_id]
-                        return
+    def apply_bot_move(user_id, state, col):
+        try:
+            send_board(games.apply_bot_move(user_id, state, col))
+        except Exception as e:
+            logger.error(f"Error in apply_bot_move: {e}")
 
-                    update_single_board(bot, user_id)
+    def restore_player_turn(user_id, state):
+        try:
+            send_board(games.restore_player_turn(user_id, state))
         except Exception as e:
-            logger.error(f"Error in handle_single_move: {e}")
+            logger.error(f"Error in restore_player_turn: {e}")
 
     # --- end game buttons (new_game / main_menu) ---
     @bot.callback_query_handler(func=lambda call: call.data in ["new_game", "main_menu"])
@@ -218,17 +118,9 @@ def register_callbacks(bot):
         try:
             user_id = call.from_user.id
             if call.data == "new_game":
-                markup = types.InlineKeyboardMarkup()
-                markup.add(types.InlineKeyboardButton("آسون 😊 (همینجوری الکی فقط مهره میندازه)", callback_data="difficulty_easy"))
-                markup.add(types.InlineKeyboardButton("متوسط 😎 (با استدلال های ساده بازی رو جلو میبره)", callback_data="difficulty_medium"))
-                markup.add(types.InlineKeyboardButton("سخت 😈 (بردن این سختی ، کار هر کسی نیست)", callback_data="difficulty_hard"))
-                bot.edit_message_text("سطح سختی رو انتخاب کن: 🎯", call.message.chat.id, call.message.message_id, reply_markup=markup)
+                outbox.edit_message_text(DIFFICULTY_PROMPT, call.message.chat.id, call.message.message_id, reply_markup=difficulty_markup())
             else:
-                markup = types.InlineKeyboardMarkup()
-                markup.add(types.InlineKeyboardButton("شروع بازی 🎲", callback_data="start_game"))
-                if user_id in ADMIN_USER_IDS:
-                    markup.add(types.InlineKeyboardButton("پیام همگانی 📢", callback_data="broadcast"))
-                bot.edit_message_text("به منوی اصلی خوش اومدی! 🌟", call.message.chat.id, call.message.message_id, reply_markup=markup)
+                outbox.edit_message_text(MAIN_MENU_TEXT, call.message.chat.id, call.message.message_id, reply_markup=main_menu_markup(user_id))
         except Exception as e:
             logger.error(f"Error in handle_end_game: {e}")
 
@@ -237,48 +129,23 @@ def register_callbacks(bot):
     def inline_query(query):
         try:
             user_id = query.from_user.id
+            allowed, limit_message = check_rate_limit(user_id, "inline")
+            if not allowed:
+                bot.answer_inline_query(query.id, [article(RATE_LIMITED_TITLE, limit_message)], cache_time=1)
+                return
             # check user in DB
-            with sqlite3.connect(USER_DB) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT first_name FROM users WHERE user_id = ?', (user_id,))
-                user = cursor.fetchone()
+            user_name = get_user_first_name(user_id)
 
-            if not user:
-                results = [
-                    types.InlineQueryResultArticle(
-                        id=str(uuid.uuid4()),
-                        title="ربات رو استارت نکردی ! برای جزئیات کلیک کن",
-                        input_message_content=types.InputTextMessageContent("اول وارد ربات @Rez4InARowBot شو و دستور /start رو بزن تا به عنوان کاربر بازی شناخته بشی بعدش میتونی دو نفره هم بازی کنی 😊")
-                    )
-                ]
+            if user_name is None:
+                results = [article("ربات رو استارت نکردی ! برای جزئیات کلیک کن", NOT_STARTED_TEXT)]
                 bot.answer_inline_query(query.id, results, cache_time=1)
                 return
 
-            user_name = user[0]
-            results = [
-                types.InlineQueryResultArticle(
-                    id=str(uuid.uuid4()),
-                    title="شروع بازی دو نفره 🎮",
-                    input_message_content=types.InputTextMessageContent(
-                        f"{user_name} می‌خواد یه بازی دو نفره ۴ در یک ردیف انجام بده، کی پایه‌ست؟ 😎"
-                    ),
-                    reply_markup=types.InlineKeyboardMarkup().add(
-                        types.InlineKeyboardButton("پایه‌م! 💪", callback_data=f"join_{user_id}")
-                    )
-                )
-            ]
+            results = invite_results(user_id, user_name)
             bot.answer_inline_query(query.id, results, cache_time=0)
         except Exception as e:
             logger.error(f"Error in inline_query: {e}")
-            results = [
-                types.InlineQueryResultArticle(
-                    id=str(uuid.uuid4()),
-                    title="خطا",
-                    input_message_content=types.InputTextMessageContent(
-                        "خطایی رخ داد. لطفاً دوباره امتحان کنید."
-                    )
-                )
-            ]
+            results = [article("خطا", ERROR_TEXT)]
             bot.answer_inline_query(query.id, results, cache_time=1)
 
     # --- join game (from inline) ---
@@ -292,235 +159,72 @@ def register_callbacks(bot):
                 bot.answer_callback_query(call.id, "نمی‌تونی با خودت بازی کنی! 😅")
                 return
 
-            with sqlite3.connect(USER_DB) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT first_name FROM users WHERE user_id = ?', (challenger_id,))
-                challenger = cursor.fetchone()
-            if not challenger:
+            challenger_name = get_user_first_name(challenger_id)
+            if challenger_name is None:
                 bot.answer_callback_query(call.id, "کاربر شروع‌کننده پیدا نشد! لطفاً دوباره امتحان کن.")
                 return
 
-            with sqlite3.connect(USER_DB) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT first_name FROM users WHERE user_id = ?', (opponent_id,))
-                opponent = cursor.fetchone()
-            if not opponent:
-                bot.answer_callback_query(call.id, "اول وارد ربات @Rez4InARowBot شو و دستور /start رو بزن تا به عنوان کاربر بازی شناخته بشی بعدش میتونی دو نفره هم بازی کنی 😊")
+            if get_user_first_name(opponent_id) is None:
+                bot.answer_callback_query(call.id, NOT_STARTED_TEXT)
                 return
 
-            challenger_name = challenger[0]
-            opponent_name = call.from_user.first_name
+            if STATELESS_MULTIPLAYER:
+                text, markup = stateless.new_game(challenger_id, opponent_id, stateless.message_key(call))
+                bot.answer_callback_query(call.id, GAME_STARTED_TEXT)
+                games.edit_clicked_message(call, text, markup)
+                return
 
-            if challenger_id not in game_states:
-                game_states[challenger_id] = {
-                    "mode": "multi",
-                    "board": create_board(),
-                    "turn": "player1",
-                    "player1_id": challenger_id,
-                    "player2_id": opponent_id,
-                    "player1_name": challenger_name,
-                    "player2_name": opponent_name,
-                    "time_left": 10,
-                    "last_move_time": time(),
-                    "message_id": None if call.message is None else call.message.message_id,
-                    "chat_id": None if call.message is None else call.message.chat.id,
-                    "inline_message_id": call.inline_message_id if call.message is None else None,
-                    "rematch": []
-                }
-                bot.answer_callback_query(call.id, "بازی شروع شد! 🎮")
-                update_multi_board(bot, challenger_id)
+            answer, board = games.join_game(challenger_id, opponent_id, challenger_name, call.from_user.first_name, call)
+            if answer:
+                bot.answer_callback_query(call.id, answer)
+            send_board(board)
         except Exception as e:
             logger.error(f"Error in join_game: {e}")
-            bot.answer_callback_query(call.id, "خطایی رخ داد. لطفاً دوباره امتحان کنید.")
+            bot.answer_callback_query(call.id, ERROR_TEXT)
 
     # --- multiplayer move handlers (and surrender) ---
     @bot.callback_query_handler(func=lambda call: call.data.startswith("multi_move_") or call.data == "multi_surrender" or call.data.startswith("multi_surrender_"))
     def handle_multi_move(call):
         try:
-            user_id = call.from_user.id
-            # find challenger game
-            challenger_id = None
-            for c_id, st in game_states.items():
-                if st.get("mode") == "multi" and (st.get("player1_id") == user_id or st.get("player2_id") == user_id):
-                    challenger_id = c_id
-                    break
-
-            if not challenger_id:
-                bot.answer_callback_query(call.id, "تو داخل بازی نیستی دوست عزیز ")
-                return
-
-            state = game_states[challenger_id]
-
-            # surrender
-            if call.data == "multi_surrender":
-                winner_name = state["player2_name"] if state["player1_id"] == user_id else state["player1_name"]
-                board_message = f"🏳️ {call.from_user.first_name} تسلیم شد!\n\nبرنده: {winner_name} 🎉"
-                try:
-                    if state.get("chat_id") and state.get("message_id"):
-                        bot.edit_message_text(board_message, state["chat_id"], state["message_id"], parse_mode="Markdown")
-                    elif state.get("inline_message_id"):
-                        bot.edit_message_text(board_message, inline_message_id=state["inline_message_id"], parse_mode="Markdown")
-                except Exception as e:
-                    logger.error(f"Error ending game after surrender: {e}")
-                del game_states[challenger_id]
-                return
-
-            # column index
-            col = int(call.data.split("_")[2])
-
-            if state["board"][0][col] is not None:
-                bot.answer_callback_query(call.id, "این ستون پره! 😕")
-                return
-
-            # check turn
-            if (state["turn"] == "player1" and state["player1_id"] != user_id) or \
-               (state["turn"] == "player2" and state["player2_id"] != user_id):
-                bot.answer_callback_query(call.id, "الان نوبتت نیست! ⏳")
-                return
-
-            player_symbol = "player1" if state["turn"] == "player1" else "player2"
-            drop_piece(state["board"], col, player_symbol)
-
-            # check winner
-            if check_winner(state["board"], player_symbol):
-                winner_name = state["player1_name"] if state["turn"] == "player1'".replace("'", "") else None
-                # above line in original had simpler logic; we'll compute winner properly:
-                winner_name = state["player1_name"] if state["turn"] == "player1" else state["player2_name"]
-                winner_id = state["player1_id"] if state["turn"] == "player1" else state["player2_id"]
-                update_leaderboard(winner_id, winner_name, 2)
-
-                board_message = f"🎉 {winner_name} برنده شد!\n\n{render_multi_board(state['board'])}"
-                rematch_markup = types.InlineKeyboardMarkup()
-                rematch_markup.add(types.InlineKeyboardButton("بازی مجدد 🎮", callback_data=f"rematch_{challenger_id}"))
-
-                try:
-                    if state.get("chat_id") and state.get("message_id"):
-                        bot.edit_message_text(board_message, state["chat_id"], state["message_id"], reply_markup=rematch_markup, parse_mode="Markdown")
-                    elif state.get("inline_message_id"):
-                        bot.edit_message_text(board_message, inline_message_id=state["inline_message_id"], reply_markup=rematch_markup, parse_mode="Markdown")
-                except Exception as e:
-                    logger.error(f"Error ending game after win: {e}")
-
-                del game_states[challenger_id]
-                return
-
-            # check draw
-            if check_draw(state["board"]):
-                board_message = f"بازی بدون برنده به پایان رسید! 🤝\n\n{render_multi_board(state['board'])}"
-                rematch_markup = types.InlineKeyboardMarkup()
-                rematch_markup.add(types.InlineKeyboardButton("بازی مجدد 🎮", callback_data=f"rematch_{challenger_id}"))
-                try:
-                    if state.get("chat_id") and state.get("message_id"):
-                        bot.edit_message_text(board_message, state["chat_id"], state["message_id"], reply_markup=rematch_markup, parse_mode="Markdown")
-                    elif state.get("inline_message_id"):
-                        bot.edit_message_text(board_message, inline_message_id=state["inline_message_id"], reply_markup=rematch_markup, parse_mode="Markdown")
-                except Exception as e:
-                    logger.error(f"Error ending game after draw: {e}")
-                del game_states[challenger_id]
-                return
-
-            # switch turn
-            state["turn"] = "player2" if state["turn"] == "player1" else "player1"
-            state["last_move_time"] = time()
-
-            update_multi_board(bot, challenger_id)
+            answer, board = games.multi_click(call.from_user.id, call.from_user.first_name, call)
+            if answer:
+                bot.answer_callback_query(call.id, answer)
+            send_board(board)
         except Exception as e:
             logger.error(f"Error in handle_multi_move: {e}")
 
+    # --- stateless multiplayer clicks (the game comes from the callback data) ---
+    @bot.callback_query_handler(func=lambda call: is_stateless_data(call.data))
+    def handle_stateless_click(call):
+        try:
+            answer, text, markup = stateless.handle_click(
+                call.data, call.from_user.id, stateless.message_key(call)
+            )
+            if answer:
+                bot.answer_callback_query(call.id, answer)
+            if text:
+                games.edit_clicked_message(call, text, markup)
+        except Exception as e:
+            logger.error(f"Error in handle_stateless_click: {e}")
+
     # --- rematch handler ---
     @bot.callback_query_handler(func=lambda call: call.data.startswith("rematch_"))
     def handle_rematch(call):
         try:
-            user_id = call.from_user.id
-            chat_id = call.message.chat.id if call.message else None
-            for state in list(game_states.values()):
-                if state["mode"] == "multi" and (state["player1_id"] == user_id or state["player2_id"] == user_id):
-                    if user_id not in state["rematch"]:
-                        state["rematch"].append(user_id)
-                        bot.answer_callback_query(call.id, "منتظر موافقت حریفت هستیم! ⏳")
-                        if len(state["rematch"]) == 2:
-                            # both agreed -> create new game
-                            game_states[state["player1_id"]] = {
-                                "mode": "multi",
-                                "board": create_board(),
-                                "turn": "player1",
-                                "player1_id": state["player1_id"],
-                                "player2_id": state["player2_id"],
-                                "player1_name": state["player1_name"],
-                                "player2_name": state["player2_name"],
-                                "time_left": 10,
-                                "last_move_time": time(),
-                                "message_id": None,
-                                "chat_id": chat_id,
-                                "rematch": []
-                            }
-                            update_multi_board(bot, state["player1_id"])
-                    break
-            else:
-                bot.answer_callback_query(call.id, "بازی جدیدی شروع کن! 🎮")
+            answer, board = games.rematch_click(call.from_user.id, call.data[len("rematch_"):], call)
+            if answer:
+                bot.answer_callback_query(call.id, answer)
+            send_board(board)
         except Exception as e:
             logger.error(f"Error in handle_rematch: {e}")
 
-    # --- update functions (these interact with the bot directly) ---
-    def update_single_board(bot, user_id):
-        try:
-            if user_id not in game_states or game_states[user_id]["mode"] != "single":
-                return
-            state = game_states[user_id]
-            board = state["board"]
-            user_name = state["user_name"]
-            turn = "کاربر" if state["turn"] == "player" else "ربات"
-
-            board_message = f"🔵 {user_name}\n🔴 ربات\nنوبت: {turn}\n\nحواست باشه که خود ردیف اول رو هم میتونی مهره بزاری  !!!\n\nو این نکته رو هم در نظر بگیر که سختی بازی رو هر چقدر که بیشتر بکنی بیشتر طول میکشه که ربات بازی رو تحلیل کنه ، پس یکم صبور باش  ، ممکنه توی سختی آخر تا 20 ثانیه هم هر نوبت طول بکشه "
-            markup = create_board_markup(board)
-            markup.add(types.InlineKeyboardButton("تسلیم 🏳️", callback_data="surrender"))
-            try:
-                if state.get("message_id"):
-                    bot.edit_message_text(board_message, state["chat_id"], state["message_id"], reply_markup=markup, parse_mode="Markdown")
-                else:
-                    state["message_id"] = bot.send_message(state["chat_id"], board_message, reply_markup=markup, parse_mode="Markdown").message_id
-            except Exception as e:
-                # on failure try sending fresh message (like original)
-                try:
-                    state["message_id"] = bot.send_message(state["chat_id"], board_message, reply_markup=markup, parse_mode="Markdown").message_id
-                except Exception as ex:
-                    logger.error(f"Error sending single board message: {ex}")
-        except Exception as e:
-            logger.error(f"Error in update_single_board: {e}")
-
-    def update_multi_board(bot, challenger_id):
+    def send_board(board):
+        # first message of a game that has none yet (see handlers/games.py);
+        # the API layer already retried, so a second send could duplicate the board
+        if board is None:
+            return
+        state, text, markup = board
         try:
-            if challenger_id not in game_states or game_states[challenger_id]["mode"] != "multi":
-                return
-            state = game_states[challenger_id]
-            board = state["board"]
-            time_left = max(0, 10 - int(time() - state["last_move_time"]))
-
-            if time_left == 0:
-                state["turn"] = "player2" if state["turn"] == "player1" else "player1"
-                state["last_move_time"] = time()
-                time_left = 10
-
-            board_message = (
-                f"🔵 {state['player1_name']}\n"
-                f"🔴 {state['player2_name']}\n"
-                f"نوبت: {state['player1_name'] if state['turn'] == 'player1' else state['player2_name']} ⏳ {time_left} ثانیه\n\n"
-                f"{render_multi_board(board)}"
-            )
-            markup = create_board_markup(board, prefix="multi_move")
-            markup.add(types.InlineKeyboardButton("تسلیم 🏳️", callback_data="multi_surrender"))
-
-            try:
-                if state.get("chat_id") and state.get("message_id"):
-                    bot.edit_message_text(board_message, state["chat_id"], state["message_id"], reply_markup=markup, parse_mode="Markdown")
-                elif state.get("inline_message_id"):
-                    bot.edit_message_text(board_message, inline_message_id=state["inline_message_id"], reply_markup=markup, parse_mode="Markdown")
-                else:
-                    if state.get("chat_id"):
-                        state["message_id"] = bot.send_message(state["chat_id"], board_message, reply_markup=markup, parse_mode="Markdown").message_id
-                    elif state.get("inline_message_id"):
-                        bot.edit_message_text(board_message, inline_message_id=state["inline_message_id"], reply_markup=markup, parse_mode="Markdown")
-            except Exception as e:
-                logger.error(f"Error updating multiplayer board for challenger {challenger_id}: {e}")
+            state.message_id = bot.send_message(state.chat_id, text, reply_markup=markup, parse_mode="Markdown").message_id
         except Exception as e:
-            logger.error(f"Error in update_multi_board: {e}")
+            logger.error(f"Error sending board message: {e}")
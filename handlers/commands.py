@@ -1,10 +1,34 @@
 # handlers/commands.py
 from telebot import types
 from config import ADMIN_USER_IDS
-from database import save_user, get_leaderboard
+from database import save_user, get_leaderboard, get_user_rank, get_user_cache_stats
 from utils import is_message_valid, check_rate_limit
+from handlers.views import (
+    welcome_message, main_menu_markup, HELP_MESSAGE, leaderboard_message, rank_message, api_stats_message, cache_stats_message,
+    outbox_stats_message
+)
+from outbox import outbox
+from position_cache import move_cache
+import telegram_api
 from config import logger
 
+def bot_commands():
+    return [
+        types.BotCommand("start", "شروع ربات"),
+        types.BotCommand("help", "راهنمای بازی"),
+        types.BotCommand("leaderboard", "نمایش برترین‌ها"),
+        types.BotCommand("rank", "رتبه من"),
+        types.BotCommand("alive", "چک کردن وضعیت ربات")
+    ]
+
+def admin_stats_message():
+    # /stats: per-method Telegram API latency and error counts, cache hit
+    # rates and the message edit queue; shared with the async runtime
+    caches = [("حرکت‌های ربات", move_cache.stats()), ("کاربران", get_user_cache_stats())]
+    return "\n\n".join([
+        api_stats_message(telegram_api.stats.snapshot()), cache_stats_message(caches), outbox_stats_message(outbox.stats())
+    ])
+
 def register_commands(bot):
     @bot.message_handler(commands=['start'])
     def start_command(message):
@@ -23,17 +47,8 @@ def register_commands(bot):
 
             save_user(user_id, username, user_name, ADMIN_USER_IDS)
 
-            welcome_message = f'''
-🌟 سلام {user_name} به ربات ۴ در یک ردیف خوش اومدی! 🎮
-
-🔹 می‌تونی تک‌نفره با ربات بازی کنی یا با دوستت تو حالت دو نفره! 😎
-🔹 برای اطلاعات بیشتر، روی /help کلیک کن 📚
-'''
-            markup = types.InlineKeyboardMarkup()
-            markup.add(types.InlineKeyboardButton("شروع بازی 🎲", callback_data="start_game"))
-            if user_id in ADMIN_USER_IDS:
-                markup.add(types.InlineKeyboardButton("پیام همگانی 📢", callback_data="broadcast"))
-            bot.send_message(message.chat.id, welcome_message, parse_mode="Markdown", reply_markup=markup)
+            markup = main_menu_markup(user_id)
+            bot.send_message(message.chat.id, welcome_message(user_name), parse_mode="Markdown", reply_markup=markup)
         except Exception as e:
             logger = __import__('config').logger
             logger.error(f"Error in start_command: {e}")
@@ -48,27 +63,7 @@ def register_commands(bot):
             if not allowed:
                 bot.send_message(user_id, error_message)
                 return
-            help_message = '''
-🎮 راهنمای بازی ۴ در یک ردیف 🎲
-
-🔹 **حالت تک نفره**:
-۱. با دستور /start ربات رو شروع کن.
-۲. روی «شروع بازی» کلیک کن و یکی از سطح‌های سختی (آسان، متوسط، سخت) رو انتخاب کن.
-۳. توی صفحه ۷×۷، روی دکمه‌های بالای جدول کلیک کن تا مهره‌ت (🔵) رو بندازی.
-۴. ربات با مهره (🔴) باهات بازی می‌کنه.
-۵. هدف: ۴ تا مهره رو به صورت افقی، عمودی یا مورب پشت هم بیار تا ببری!
-
-🔹 **حالت دو نفره**:
-۱. توی یه چت گروهی یا خصوصی، از حالت اینلاین استفاده کن و «پایه‌م!» رو بزن.
-۲. هر بازیکن ۱۰ ثانیه وقت داره حرکت کنه.
-
-🔹 **دستورات**:
-- /start: شروع ربات
-- /help: راهنما
-- /leaderboard: نمایش برترین‌ها
-- /alive: چک کردن وضعیت ربات
-'''
-            bot.send_message(message.chat.id, help_message, parse_mode="Markdown")
+            bot.send_message(message.chat.id, HELP_MESSAGE, parse_mode="Markdown")
         except Exception as e:
             logger = __import__('config').logger
             logger.error(f"Error in help_command: {e}")
@@ -98,15 +93,34 @@ def register_commands(bot):
             if not allowed:
                 bot.send_message(user_id, error_message)
                 return
-            leaders = get_leaderboard()
-            if not leaders:
-                bot.send_message(user_id, "هنوز هیچ برنده‌ای نداریم! 🏆 بازی کن و اولین باش!")
-                return
-            leaderboard_text = "🏆 برترین‌های بازی ۴ در یک ردیف:\n\n"
-            for i, (first_name, username, score) in enumerate(leaders, 1):
-                username = f"@{username}" if username and username != "ندارد" else ""
-                leaderboard_text += f"{i}. {first_name} {username} - {score} امتیاز\n"
-            bot.send_message(user_id, leaderboard_text)
+            bot.send_message(user_id, leaderboard_message(get_leaderboard()))
         except Exception as e:
             logger = __import__('config').logger
             logger.error(f"Error in leaderboard_command: {e}")
+
+    @bot.message_handler(commands=['rank'])
+    def rank_command(message):
+        try:
+            if not is_message_valid(message):
+                return
+            user_id = message.from_user.id
+            allowed, error_message = check_rate_limit(user_id)
+            if not allowed:
+                bot.send_message(user_id, error_message)
+                return
+            bot.send_message(message.chat.id, rank_message(get_user_rank(user_id)))
+        except Exception as e:
+            logger = __import__('config').logger
+            logger.error(f"Error in rank_command: {e}")
+
+    @bot.message_handler(commands=['stats'])
+    def stats_command(message):
+        # admins only
+        try:
+            if not is_message_valid(message):
+                return
+            if message.from_user.id not in ADMIN_USER_IDS:
+                return
+            bot.send_message(message.chat.id, admin_stats_message())
+        except Exception as e:
+            logger.error(f"Error in stats_command: {e}")
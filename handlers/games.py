@@ -0,0 +1,260 @@
+# handlers/games.py
+# Single-player and multiplayer games kept in game_registry, shared by the
+# sync and async handlers like handlers/stateless.py. Every message edit
+# goes through the outbox in both runtimes, so edits are paced and coalesced
+# the same way and a turn timer refresh can't land after a newer board.
+#
+# Functions return the toast to answer the click with (None for no answer)
+# and a board the handler still has to send, as (state, text, markup), when
+# the game has no message yet: sending needs the runtime's own bot, which
+# stores the new message id in state.message_id. Nothing here touches
+# SQLite, so the async handlers can call it from the event loop.
+from time import time
+from database import update_leaderboard
+from game_logic import render_board, render_multi_board, drop_piece, check_winner_at, check_draw, end_game_markup, is_valid_move
+from game_registry import (
+    get_game, get_single_game, find_multi_game, add_game, add_message_game, remove_game, new_multi_game_id,
+    get_rematch_game, keep_for_rematch, pop_rematch_game
+)
+from game_state import SingleGame, MultiGame
+from handlers.views import (
+    SURRENDER_PROMPT, NOT_IN_GAME_TEXT, GAME_OVER_TEXT, GAME_STARTED_TEXT, NOT_YOUR_TURN_TEXT, COLUMN_FULL_TEXT,
+    REMATCH_WAIT_TEXT, SINGLE_POINTS, MULTI_POINTS, surrender_markup, single_board_view, multi_board_view, rematch_markup
+)
+from outbox import outbox
+from turn_timer import turn_timer, turn_time_left
+from utils import check_rate_limit
+
+NO_SINGLE_GAME_TEXT = "بازی فعالی وجود نداره! /start رو بزن."
+BOT_TURN_TEXT = "نوبتت نیست، صبر کن! ⏳"
+SINGLE_COLUMN_FULL_TEXT = "این ستون پره! یه ستون دیگه انتخاب کن. 😕"
+
+
+def edit_clicked_message(call, text, markup=None):
+    if call.inline_message_id:
+        outbox.edit_message_text(text, inline_message_id=call.inline_message_id, reply_markup=markup, parse_mode="Markdown")
+    else:
+        outbox.edit_message_text(text, call.message.chat.id, call.message.message_id, reply_markup=markup, parse_mode="Markdown")
+
+
+def _edit_multi(state, text, markup=None):
+    # False when the game has no message to edit yet
+    if state.chat_id and state.message_id:
+        outbox.edit_message_text(text, state.chat_id, state.message_id, reply_markup=markup, parse_mode="Markdown")
+    elif state.inline_message_id:
+        outbox.edit_message_text(text, inline_message_id=state.inline_message_id, reply_markup=markup, parse_mode="Markdown")
+    else:
+        return False
+    return True
+
+
+# --- single player ---
+
+def single_board(user_id):
+    state = get_single_game(user_id)
+    if state is None:
+        return None
+    text, markup = single_board_view(state)
+    if not state.message_id:
+        return state, text, markup
+    outbox.edit_message_text(text, state.chat_id, state.message_id, reply_markup=markup, parse_mode="Markdown")
+    return None
+
+
+def start_single_game(user_id, user_name, chat_id, difficulty):
+    add_game(user_id, SingleGame(user_name, chat_id, difficulty))
+    return single_board(user_id)
+
+
+def _end_single_game(user_id, state, text):
+    outbox.edit_message_text(text, state.chat_id, state.message_id, reply_markup=end_game_markup())
+    remove_game(user_id, state)
+
+
+def single_click(user_id, data):
+    # (toast, board to send, state); the state is returned when the bot
+    # should move next, and clicks are rejected until its move is applied
+    state = get_single_game(user_id)
+    if state is None:
+        return NO_SINGLE_GAME_TEXT, None, None
+    # a double tap, or the bot's move landing, may change the turn meanwhile
+    with state.lock:
+        if get_game(user_id) is not state:
+            return NO_SINGLE_GAME_TEXT, None, None
+        return _single_click(user_id, state, data)
+
+
+def _single_click(user_id, state, data):
+    # surrender flow
+    if data == "surrender":
+        outbox.edit_message_text(SURRENDER_PROMPT, state.chat_id, state.message_id, reply_markup=surrender_markup(user_id))
+        return None, None, None
+    if data.startswith("surrender_yes_"):
+        _end_single_game(user_id, state, "تو تسلیم شدی! 🏳️")
+        return None, None, None
+    if data.startswith("surrender_no_"):
+        return None, single_board(user_id), None
+
+    if state.turn != "player":
+        return BOT_TURN_TEXT, None, None
+    allowed, err = check_rate_limit(user_id, "move")
+    if not allowed:
+        return err, None, None
+    col = int(data.split("_")[1])
+    if not is_valid_move(state.board, col):
+        return SINGLE_COLUMN_FULL_TEXT, None, None
+
+    board = state.board
+    row = drop_piece(board, col, "player")
+    state.touch()
+    if check_winner_at(board, row, col, "player"):
+        points = SINGLE_POINTS[state.difficulty]
+        update_leaderboard(user_id, state.user_name, points)
+        _end_single_game(user_id, state, f"تو برنده شدی! 🎉 {points} امتیاز گرفتی\n\n{render_board(board)}")
+        return None, None, None
+    if check_draw(board):
+        _end_single_game(user_id, state, f"بازی بدون برنده به پایان رسید! 🤝\n\n {render_board(board)}")
+        return None, None, None
+
+    state.turn = "bot"
+    return None, single_board(user_id), state
+
+
+def apply_bot_move(user_id, state, col):
+    # board to send, or None
+    with state.lock:
+        # the game may have been surrendered or restarted while the bot was thinking
+        if get_game(user_id) is not state or state.turn != "bot" or col is None:
+            return None
+        board = state.board
+        row = drop_piece(board, col, "bot")
+        state.turn = "player"
+        state.touch()
+        if check_winner_at(board, row, col, "bot"):
+            _end_single_game(user_id, state, f"ربات برنده شد! 😢\n\n{render_board(board)}")
+            return None
+        if check_draw(board):
+            _end_single_game(user_id, state, f"بازی بدون برنده به پایان رسید! 🤝\n\n {render_board(board)}")
+            return None
+        return single_board(user_id)
+
+
+def restore_player_turn(user_id, state):
+    # AI worker failed: hand the turn back instead of leaving the game stuck
+    with state.lock:
+        if get_game(user_id) is not state or state.turn != "bot":
+            return None
+        state.turn = "player"
+        return single_board(user_id)
+
+
+# --- multiplayer ---
+
+def multi_board(game_id):
+    state = get_game(game_id)
+    if state is None or state.mode != "multi":
+        return None
+    # turns that run out are handled by the turn timer
+    text, markup = multi_board_view(state, turn_time_left(state, time()))
+    turn_timer.schedule(game_id, state)
+    if _edit_multi(state, text, markup) or not state.chat_id:
+        return None
+    return state, text, markup
+
+
+def _clicked_message_game(player1_id, player2_id, player1_name, player2_name, call):
+    # a new game shown on the clicked message
+    return MultiGame(
+        player1_id, player2_id, player1_name, player2_name,
+        message_id=None if call.message is None else call.message.message_id,
+        chat_id=None if call.message is None else call.message.chat.id,
+        inline_message_id=call.inline_message_id if call.message is None else None
+    )
+
+
+def join_game(challenger_id, opponent_id, challenger_name, opponent_name, call):
+    # (toast, board to send); a second click on the same invite must not
+    # restart the game, so it gets no answer
+    game_id = new_multi_game_id()
+    if not add_message_game(game_id, _clicked_message_game(challenger_id, opponent_id, challenger_name, opponent_name, call)):
+        return None, None
+    return GAME_STARTED_TEXT, multi_board(game_id)
+
+
+def multi_click(user_id, first_name, call):
+    # (toast, board to send) for a move or surrender click
+    game_id, state = find_multi_game(
+        call.inline_message_id, None if call.message is None else (call.message.chat.id, call.message.message_id)
+    )
+    if state is None or user_id not in (state.player1_id, state.player2_id):
+        return NOT_IN_GAME_TEXT, None
+    # the turn timer may pass the turn or end the game at the same time
+    with state.lock:
+        if get_game(game_id) is not state:
+            return GAME_OVER_TEXT, None
+        return _multi_click(game_id, state, user_id, first_name, call.data)
+
+
+def _end_multi_game(game_id, state, text, rematch=False):
+    # with `rematch` the board gets a rematch button and the game is kept
+    # until both players press it
+    _edit_multi(state, text, rematch_markup(game_id) if rematch else None)
+    remove_game(game_id)
+    turn_timer.cancel(game_id)
+    if rematch:
+        keep_for_rematch(game_id, state)
+
+
+def _multi_click(game_id, state, user_id, first_name, data):
+    if data == "multi_surrender":
+        winner_name = state.player2_name if state.player1_id == user_id else state.player1_name
+        _end_multi_game(game_id, state, f"🏳️ {first_name} تسلیم شد!\n\nبرنده: {winner_name} 🎉")
+        return None, None
+
+    col = int(data.split("_")[2])
+    if not is_valid_move(state.board, col):
+        return COLUMN_FULL_TEXT, None
+    if user_id != (state.player1_id if state.turn == "player1" else state.player2_id):
+        return NOT_YOUR_TURN_TEXT, None
+
+    player_symbol = state.turn
+    row = drop_piece(state.board, col, player_symbol)
+    state.touch()
+    state.missed_turns[0 if player_symbol == "player1" else 1] = 0
+
+    if check_winner_at(state.board, row, col, player_symbol):
+        winner_name = state.player1_name if player_symbol == "player1" else state.player2_name
+        winner_id = state.player1_id if player_symbol == "player1" else state.player2_id
+        update_leaderboard(winner_id, winner_name, MULTI_POINTS)
+        _end_multi_game(game_id, state, f"🎉 {winner_name} برنده شد!\n\n{render_multi_board(state.board)}", rematch=True)
+        return None, None
+    if check_draw(state.board):
+        _end_multi_game(game_id, state, f"بازی بدون برنده به پایان رسید! 🤝\n\n{render_multi_board(state.board)}", rematch=True)
+        return None, None
+
+    state.turn = "player2" if player_symbol == "player1" else "player1"
+    state.last_move_time = time()
+    return None, multi_board(game_id)
+
+
+def rematch_click(user_id, game_id, call):
+    # (toast, board to send); once both players agree the new game replaces
+    # the finished board
+    state = get_rematch_game(game_id)
+    if state is None:
+        return GAME_OVER_TEXT, None
+    if user_id not in (state.player1_id, state.player2_id):
+        return NOT_IN_GAME_TEXT, None
+    with state.lock:
+        if user_id in state.rematch:
+            return None, None
+        state.rematch.append(user_id)
+        state.touch()
+        if len(state.rematch) < 2:
+            return REMATCH_WAIT_TEXT, None
+    # the sweeper may have dropped the offer meanwhile
+    if not pop_rematch_game(game_id, state):
+        return GAME_OVER_TEXT, None
+    new_game_id = new_multi_game_id()
+    add_game(new_game_id, _clicked_message_game(state.player1_id, state.player2_id, state.player1_name, state.player2_name, call))
+    return GAME_STARTED_TEXT, multi_board(new_game_id)
@@ -0,0 +1,136 @@
+# handlers/stateless.py
+# Stateless multiplayer games (STATELESS_MULTIPLAYER=1). Nothing is stored
+# per game: every click carries the signed game (see game_codec) and gets
+# back the toast and message edit to show next, so any bot process can
+# serve it. Shared by the sync and async handlers; reads names and claims
+# results in SQLite, so the async handlers run it in a thread.
+#
+# A player's own client could replay an older button of their game, which
+# only rewinds that game. Each result is claimed once in the finished_games
+# table, so replays never score twice. Tokens whose turn started more than
+# GAME_HORIZON ago are refused, which bounds how long results must be kept.
+from time import time
+from database import get_user_first_name, update_leaderboard, claim_game_result
+from game_codec import encode_game, decode_game, new_game_key, parse_callback_data
+from game_logic import check_winner, check_winner_at, check_draw, drop_piece, is_valid_move, render_multi_board
+from game_state import MultiGame
+from handlers.views import (
+    NOT_IN_GAME_TEXT, GAME_OVER_TEXT, GAME_STARTED_TEXT, NOT_YOUR_TURN_TEXT, COLUMN_FULL_TEXT, REMATCH_WAIT_TEXT,
+    MULTI_POINTS, multi_board_view, stateless_rematch_markup
+)
+from turn_timer import TURN_SECONDS, turn_time_left
+
+GAME_HORIZON = 24 * 3600  # seconds a token stays valid after its turn started
+
+
+def message_key(call):
+    # the message a game's signature is bound to
+    if call.inline_message_id:
+        return call.inline_message_id
+    return f"{call.message.chat.id}:{call.message.message_id}"
+
+
+def new_game(player1_id, player2_id, key):
+    # (text, markup) of a fresh game shown in message `key`; names always
+    # come from the users table so they don't change between clicks
+    state = MultiGame(player1_id, player2_id, get_user_first_name(player1_id), get_user_first_name(player2_id))
+    return multi_board_view(state, TURN_SECONDS, encode_game(state, new_game_key(), key))
+
+
+def _other(turn):
+    return "player2" if turn == "player1" else "player1"
+
+
+def _is_over(board):
+    return check_winner(board, "player1") or check_winner(board, "player2") or check_draw(board)
+
+
+def _board_view(state, game_key, key, now):
+    return multi_board_view(state, turn_time_left(state, now), encode_game(state, game_key, key))
+
+
+def _result_view(state, game_key, key):
+    board = render_multi_board(state.board)
+    if check_winner(state.board, "player1"):
+        text = f"🎉 {state.player1_name} برنده شد!\n\n{board}"
+    elif check_winner(state.board, "player2"):
+        text = f"🎉 {state.player2_name} برنده شد!\n\n{board}"
+    else:
+        text = f"بازی بدون برنده به پایان رسید! 🤝\n\n{board}"
+    return text, stateless_rematch_markup(encode_game(state, game_key, key))
+
+
+def _claim(state, game_key):
+    return claim_game_result(game_key, state.player1_id, state.player2_id, GAME_HORIZON)
+
+
+def _rematch(state, game_key, user_id, key):
+    if user_id in state.rematch:
+        return None, None, None
+    state.rematch.append(user_id)
+    if len(state.rematch) < 2:
+        # the vote travels in the rematch button until the opponent agrees
+        return (REMATCH_WAIT_TEXT, *_result_view(state, game_key, key))
+    return (GAME_STARTED_TEXT, *new_game(state.player1_id, state.player2_id, key))
+
+
+def handle_click(data, user_id, key, now=None):
+    # (toast, text, markup); each part is None when there is nothing to send
+    now = time() if now is None else now
+    action, token = parse_callback_data(data)
+    decoded = decode_game(token, key)
+    if decoded is None or now - decoded[0].last_move_time > GAME_HORIZON:
+        return GAME_OVER_TEXT, None, None
+    state, game_key = decoded
+    if user_id not in (state.player1_id, state.player2_id):
+        return NOT_IN_GAME_TEXT, None, None
+    state.player1_name = get_user_first_name(state.player1_id)
+    state.player2_name = get_user_first_name(state.player2_id)
+
+    if _is_over(state.board):
+        if action == "r":
+            return _rematch(state, game_key, user_id, key)
+        return GAME_OVER_TEXT, None, None
+
+    if action == "s":
+        if not _claim(state, game_key):
+            return GAME_OVER_TEXT, None, None
+        if state.player1_id == user_id:
+            loser_name, winner_name = state.player1_name, state.player2_name
+        else:
+            loser_name, winner_name = state.player2_name, state.player1_name
+        return None, f"🏳️ {loser_name} تسلیم شد!\n\nبرنده: {winner_name} 🎉", None
+
+    if not action.isdigit():
+        return GAME_OVER_TEXT, None, None
+    col = int(action)
+
+    # the turn timer only sees registered games: here an expired turn passes
+    # to the other player when the next click arrives
+    timed_out = now - state.last_move_time >= TURN_SECONDS
+    if timed_out:
+        state.turn = _other(state.turn)
+        state.last_move_time = now
+
+    if not is_valid_move(state.board, col):
+        return COLUMN_FULL_TEXT, None, None
+
+    if user_id != (state.player1_id if state.turn == "player1" else state.player2_id):
+        if timed_out:
+            return (NOT_YOUR_TURN_TEXT, *_board_view(state, game_key, key, now))
+        return NOT_YOUR_TURN_TEXT, None, None
+
+    row = drop_piece(state.board, col, state.turn)
+    won = check_winner_at(state.board, row, col, state.turn)
+    if won or check_draw(state.board):
+        if not _claim(state, game_key):
+            return GAME_OVER_TEXT, None, None
+        if won:
+            winner_id = state.player1_id if state.turn == "player1" else state.player2_id
+            winner_name = state.player1_name if state.turn == "player1" else state.player2_name
+            update_leaderboard(winner_id, winner_name, MULTI_POINTS)
+        return (None, *_result_view(state, game_key, key))
+
+    state.turn = _other(state.turn)
+    state.last_move_time = now
+    return (None, *_board_view(state, game_key, key, now))
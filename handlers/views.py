@@ -0,0 +1,187 @@
+# handlers/views.py
+# Message texts and keyboards shared by the sync and async handlers.
+import uuid
+from telebot import types
+from config import ADMIN_USER_IDS
+from game_logic import create_board_markup, render_multi_board
+from game_codec import PREFIX, callback_data
+
+DIFFICULTY_PROMPT = "سطح سختی رو انتخاب کن: 🎯"
+MAIN_MENU_TEXT = "به منوی اصلی خوش اومدی! 🌟"
+SURRENDER_PROMPT = "مطمئنی می‌خوای تسلیم بشی؟ 🏳️"
+BROADCAST_PROMPT = "هر پیامی که می‌خوای بنویس تا برای همه کاربران ارسال بشه 📢"
+NOT_STARTED_TEXT = "اول وارد ربات @Rez4InARowBot شو و دستور /start رو بزن تا به عنوان کاربر بازی شناخته بشی بعدش میتونی دو نفره هم بازی کنی 😊"
+ERROR_TEXT = "خطایی رخ داد. لطفاً دوباره امتحان کنید."
+RATE_LIMITED_TITLE = "یکم صبر کن ⏳"
+NOT_IN_GAME_TEXT = "تو داخل بازی نیستی دوست عزیز "
+GAME_OVER_TEXT = "بازی جدیدی شروع کن! 🎮"
+GAME_STARTED_TEXT = "بازی شروع شد! 🎮"
+NOT_YOUR_TURN_TEXT = "الان نوبتت نیست! ⏳"
+COLUMN_FULL_TEXT = "این ستون پره! 😕"
+REMATCH_WAIT_TEXT = "منتظر موافقت حریفت هستیم! ⏳"
+
+# leaderboard points for beating the bot
+SINGLE_POINTS = {"easy": 1, "medium": 3, "hard": 10}
+MULTI_POINTS = 2
+
+HELP_MESSAGE = '''
+🎮 راهنمای بازی ۴ در یک ردیف 🎲
+
+🔹 **حالت تک نفره**:
+۱. با دستور /start ربات رو شروع کن.
+۲. روی «شروع بازی» کلیک کن و یکی از سطح‌های سختی (آسان، متوسط، سخت) رو انتخاب کن.
+۳. توی صفحه ۷×۷، روی دکمه‌های بالای جدول کلیک کن تا مهره‌ت (🔵) رو بندازی.
+۴. ربات با مهره (🔴) باهات بازی می‌کنه.
+۵. هدف: ۴ تا مهره رو به صورت افقی، عمودی یا مورب پشت هم بیار تا ببری!
+
+🔹 **حالت دو نفره**:
+۱. توی یه چت گروهی یا خصوصی، از حالت اینلاین استفاده کن و «پایه‌م!» رو بزن.
+۲. هر بازیکن ۱۰ ثانیه وقت داره حرکت کنه.
+
+🔹 **دستورات**:
+- /start: شروع ربات
+- /help: راهنما
+- /leaderboard: نمایش برترین‌ها
+- /rank: رتبه خودت توی جدول
+- /alive: چک کردن وضعیت ربات
+'''
+
+
+def welcome_message(user_name):
+    return f'''
+🌟 سلام {user_name} به ربات ۴ در یک ردیف خوش اومدی! 🎮
+
+🔹 می‌تونی تک‌نفره با ربات بازی کنی یا با دوستت تو حالت دو نفره! 😎
+🔹 برای اطلاعات بیشتر، روی /help کلیک کن 📚
+'''
+
+
+def main_menu_markup(user_id):
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton("شروع بازی 🎲", callback_data="start_game"))
+    if user_id in ADMIN_USER_IDS:
+        markup.add(types.InlineKeyboardButton("پیام همگانی 📢", callback_data="broadcast"))
+    return markup
+
+
+def difficulty_markup():
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton("آسون 😊 (همینجوری الکی فقط مهره میندازه)", callback_data="difficulty_easy"))
+    markup.add(types.InlineKeyboardButton("متوسط 😎 (با استدلال های ساده بازی رو جلو میبره)", callback_data="difficulty_medium"))
+    markup.add(types.InlineKeyboardButton("سخت 😈 (بردن این سختی ، کار هر کسی نیست)", callback_data="difficulty_hard"))
+    return markup
+
+
+def surrender_markup(user_id):
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton("آره 😔", callback_data=f"surrender_yes_{user_id}"))
+    markup.add(types.InlineKeyboardButton("نه، پشیمون شدم! 😅", callback_data=f"surrender_no_{user_id}"))
+    return markup
+
+
+def leaderboard_message(leaders):
+    if not leaders:
+        return "هنوز هیچ برنده‌ای نداریم! 🏆 بازی کن و اولین باش!"
+    leaderboard_text = "🏆 برترین‌های بازی ۴ در یک ردیف:\n\n"
+    for i, (first_name, username, score) in enumerate(leaders, 1):
+        username = f"@{username}" if username and username != "ندارد" else ""
+        leaderboard_text += f"{i}. {first_name} {username} - {score} امتیاز\n"
+    return leaderboard_text
+
+
+def rank_message(rank):
+    if rank is None:
+        return "هنوز امتیازی نگرفتی! 🎮 بازی کن و وارد جدول شو!"
+    position, score, total = rank
+    return f"🏅 رتبه تو: {position} از {total} بازیکن با {score} امتیاز"
+
+
+def api_stats_message(api_stats):
+    # api_stats: telegram_api.stats.snapshot()
+    if not api_stats:
+        return "📊 هنوز درخواستی به تلگرام ارسال نشده."
+    lines = ["📊 آمار درخواست‌ها به تلگرام:\n"]
+    for method, entry in sorted(api_stats.items(), key=lambda item: -item[1]["calls"]):
+        lines.append(
+            f"{method}: {entry['calls']} درخواست، {entry['errors']} خطا، "
+            f"میانگین {entry['avg_ms']:.0f}ms، بیشینه {entry['max_ms']:.0f}ms"
+        )
+    return "\n".join(lines)
+
+
+def cache_stats_message(caches):
+    # caches: [(title, LRUCache.stats())]
+    lines = ["🗂 آمار کش‌ها:\n"]
+    for title, entry in caches:
+        lookups = entry["hits"] + entry["misses"]
+        lines.append(f"{title}: {entry['size']} مورد، {entry['hit_rate']:.0%} موفق از {lookups} جستجو")
+    return "\n".join(lines)
+
+
+def outbox_stats_message(outbox_stats):
+    # outbox_stats: outbox.stats()
+    return (
+        "✏️ صف ویرایش پیام‌ها:\n\n"
+        f"{outbox_stats['queued']} در صف، {outbox_stats['coalesced']} ادغام‌شده، {outbox_stats['unchanged']} بدون تغییر، "
+        f"{outbox_stats['sent']} ارسال‌شده، {outbox_stats['failed']} ناموفق، {outbox_stats['pending']} در انتظار"
+    )
+
+
+def single_board_view(state):
+    # (text, markup) of a single player game in progress
+    turn = "کاربر" if state.turn == "player" else "ربات"
+    board_message = f"🔵 {state.user_name}\n🔴 ربات\nنوبت: {turn}\n\nحواست باشه که خود ردیف اول رو هم میتونی مهره بزاری  !!!\n\nو این نکته رو هم در نظر بگیر که سختی بازی رو هر چقدر که بیشتر بکنی بیشتر طول میکشه که ربات بازی رو تحلیل کنه ، پس یکم صبور باش  ، ممکنه توی سختی آخر چند ثانیه هم هر نوبت طول بکشه "
+    markup = create_board_markup(state.board)
+    markup.add(types.InlineKeyboardButton("تسلیم 🏳️", callback_data="surrender"))
+    return board_message, markup
+
+
+def multi_board_view(state, time_left, token=None):
+    # (text, markup) of a multiplayer game in progress; stateless games pass
+    # their signed token so every button carries the game
+    board_message = (
+        f"🔵 {state.player1_name}\n"
+        f"🔴 {state.player2_name}\n"
+        f"نوبت: {state.player1_name if state.turn == 'player1' else state.player2_name} ⏳ {time_left} ثانیه\n\n"
+        f"{render_multi_board(state.board)}"
+    )
+    if token:
+        markup = create_board_markup(state.board, prefix=PREFIX, token=token)
+        markup.add(types.InlineKeyboardButton("تسلیم 🏳️", callback_data=callback_data("s", token)))
+    else:
+        markup = create_board_markup(state.board, prefix="multi_move")
+        markup.add(types.InlineKeyboardButton("تسلیم 🏳️", callback_data="multi_surrender"))
+    return board_message, markup
+
+
+def rematch_markup(game_id):
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton("بازی مجدد 🎮", callback_data=f"rematch_{game_id}"))
+    return markup
+
+
+def stateless_rematch_markup(token):
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton("بازی مجدد 🎮", callback_data=callback_data("r", token)))
+    return markup
+
+
+def article(title, text, reply_markup=None):
+    return types.InlineQueryResultArticle(
+        id=str(uuid.uuid4()),
+        title=title,
+        input_message_content=types.InputTextMessageContent(text),
+        reply_markup=reply_markup
+    )
+
+
+def invite_results(user_id, user_name):
+    return [
+        article(
+            "شروع بازی دو نفره 🎮",
+            f"{user_name} می‌خواد یه بازی دو نفره ۴ در یک ردیف انجام بده، کی پایه‌ست؟ 😎",
+            types.InlineKeyboardMarkup().add(
+                types.InlineKeyboardButton("پایه‌م! 💪", callback_data=f"join_{user_id}")
+            )
+        )
+    ]
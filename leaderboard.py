@@ -0,0 +1,62 @@
+# leaderboard.py
+# In-memory copy of the leaderboard, kept in score order so /leaderboard and
+# /rank never scan the table. Entries are (-score, user_id) tuples in a
+# sorted list: the top K is a slice and a rank is one bisect. Like the old
+# JOIN with users, only players who ran /start are ranked.
+import threading
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    def __init__(self):
+        self._order = []  # sorted [(-score, user_id)]
+        self._scores = {}  # {user_id: score}
+        self._names = {}  # {user_id: first_name}
+        self._usernames = {}  # {user_id: username}, only users who ran /start
+        self._lock = threading.Lock()
+
+    def load(self, score_rows, user_rows):
+        # score_rows: (user_id, first_name, score); user_rows: (user_id, username)
+        with self._lock:
+            self._scores = {user_id: score for user_id, _, score in score_rows}
+            self._names = {user_id: first_name for user_id, first_name, _ in score_rows}
+            self._usernames = dict(user_rows)
+            self._order = sorted(
+                (-score, user_id) for user_id, score in self._scores.items() if user_id in self._usernames
+            )
+
+    def set_user(self, user_id, username):
+        with self._lock:
+            known = user_id in self._usernames
+            self._usernames[user_id] = username
+            score = self._scores.get(user_id)
+            if not known and score is not None:
+                insort(self._order, (-score, user_id))
+
+    def add_score(self, user_id, first_name, points):
+        with self._lock:
+            old = self._scores.get(user_id)
+            score = (old or 0) + points
+            self._scores[user_id] = score
+            self._names[user_id] = first_name
+            if user_id not in self._usernames:
+                return
+            if old is not None:
+                del self._order[bisect_left(self._order, (-old, user_id))]
+            insort(self._order, (-score, user_id))
+
+    def top(self, k):
+        # [(first_name, username, score)] of the k best players
+        with self._lock:
+            return [
+                (self._names[user_id], self._usernames[user_id], -neg_score)
+                for neg_score, user_id in self._order[:k]
+            ]
+
+    def rank(self, user_id):
+        # (rank, score, total players) or None; ties share the better rank
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None or user_id not in self._usernames:
+                return None
+            return bisect_left(self._order, (-score,)) + 1, score, len(self._order)
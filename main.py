@@ -1,45 +1,101 @@
 # main.py
 import telebot
-from config import TOKEN, logger
-from database import init_databases
+from config import (
+    TOKEN, logger, BOT_MODE, WEBHOOK_URL, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_QUEUE_SIZE
+)
+from database import init_databases, start_writer, stop_writer
+from db import close_all
 from utils import set_bot_start_time
-from handlers.commands import register_commands
+from handlers.commands import register_commands, bot_commands
 from handlers.callbacks import register_callbacks
 from handlers.inline import register_inline
+from ai_pool import start_pool, shutdown_pool
+from opening_book import load_book
+from sweeper import start_sweeper
+from broadcast import resume_broadcasts
+from webhook import WebhookServer
+from outbox import outbox
+from turn_timer import turn_timer
+import telegram_api
 
 print("✅ Bot started and polling...")
 
 def set_commands(bot):
-    commands = [
-        telebot.types.BotCommand("start", "شروع ربات"),
-        telebot.types.BotCommand("help", "راهنمای بازی"),
-        telebot.types.BotCommand("leaderboard", "نمایش برترین‌ها"),
-        telebot.types.BotCommand("alive", "چک کردن وضعیت ربات")
-    ]
     try:
-        bot.set_my_commands(commands)
+        bot.set_my_commands(bot_commands())
         logger.info("Bot commands set successfully")
     except Exception as e:
         logger.error(f"Failed to set bot commands: {e}")
 
+def start_webhook(bot):
+    # the running server, or None when the bot should fall back to polling
+    if not WEBHOOK_SECRET:
+        logger.error("BOT_MODE=webhook needs WEBHOOK_SECRET; falling back to polling")
+        return None
+    try:
+        server = WebhookServer(bot, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_QUEUE_SIZE)
+    except OSError as e:
+        logger.error(f"Failed to start webhook server: {e}; falling back to polling")
+        return None
+    server.start()
+    # without WEBHOOK_URL the server only takes local POSTs (testing)
+    if WEBHOOK_URL:
+        try:
+            bot.set_webhook(url=WEBHOOK_URL, secret_token=WEBHOOK_SECRET)
+        except Exception as e:
+            logger.error(f"Failed to set webhook: {e}; falling back to polling")
+            server.stop()
+            return None
+    return server
+
 def main():
+    telegram_api.install()
     bot = telebot.TeleBot(TOKEN)
 
     init_databases()
 
+    # load the opening book and fork AI workers before any thread starts
+    # (the DB writer included), so every worker inherits the book and no
+    # lock is held mid-fork
+    load_book()
+    start_pool()
+    start_writer()
+
     set_bot_start_time()
 
+    outbox.start(bot)
+    turn_timer.start()
+
     register_commands(bot)
     register_callbacks(bot)
     register_inline(bot)
 
     set_commands(bot)
 
-    logger.info("Starting bot polling...")
+    start_sweeper(bot)
+    resume_broadcasts(bot)
+
+    server = start_webhook(bot) if BOT_MODE == "webhook" else None
     try:
-        bot.polling(none_stop=True)
+        if server is not None:
+            logger.info("Serving webhook updates...")
+            server.wait()
+        else:
+            if BOT_MODE == "webhook":
+                # getUpdates is refused while a webhook is set
+                bot.remove_webhook()
+            logger.info("Starting bot polling...")
+            bot.polling(none_stop=True)
     except Exception as e:
         logger.error(f"Bot polling error: {e}")
+    finally:
+        if server is not None:
+            server.stop()
+        turn_timer.stop()
+        outbox.stop()
+        shutdown_pool()
+        stop_writer()
+        close_all()
 
 
 
@@ -0,0 +1,82 @@
+# main_async.py
+# asyncio entry point: the same bot on telebot's AsyncTeleBot. Handlers are
+# coroutines, so one event loop thread serves every chat while bot moves run
+# in the AI process pool and SQLite reads in the default thread pool.
+import asyncio
+import telebot
+from telebot.async_telebot import AsyncTeleBot
+from config import TOKEN, logger
+from database import init_databases, start_writer, stop_writer
+from db import close_all
+from utils import set_bot_start_time
+from handlers.commands import bot_commands
+from handlers.async_commands import register_commands
+from handlers.async_callbacks import register_callbacks
+from handlers.async_inline import register_inline
+from ai_pool import start_pool, shutdown_pool
+from opening_book import load_book
+from sweeper import start_sweeper
+from broadcast import resume_broadcasts
+from outbox import outbox
+from turn_timer import turn_timer
+import telegram_api
+
+print("✅ Bot started and polling (asyncio)...")
+
+async def set_commands(bot):
+    try:
+        await bot.set_my_commands(bot_commands())
+        logger.info("Bot commands set successfully")
+    except Exception as e:
+        logger.error(f"Failed to set bot commands: {e}")
+
+async def run(bot, sync_bot):
+    register_commands(bot)
+    register_callbacks(bot, sync_bot)
+    register_inline(bot)
+
+    await set_commands(bot)
+
+    outbox.start(sync_bot)
+    turn_timer.start()
+    start_sweeper(sync_bot)
+    resume_broadcasts(sync_bot)
+
+    logger.info("Starting bot polling...")
+    try:
+        await bot.infinity_polling()
+    finally:
+        await bot.close_session()
+
+def main():
+    bot = AsyncTeleBot(TOKEN)
+    # the sweeper and broadcast threads keep using a plain blocking client;
+    # both clients share the retries and per-method stats
+    telegram_api.install()
+    telegram_api.install_async()
+    sync_bot = telebot.TeleBot(TOKEN, threaded=False)
+
+    init_databases()
+
+    # fork AI workers before any thread or event loop exists
+    load_book()
+    start_pool()
+    start_writer()
+
+    set_bot_start_time()
+
+    try:
+        asyncio.run(run(bot, sync_bot))
+    except Exception as e:
+        logger.error(f"Bot polling error: {e}")
+    finally:
+        turn_timer.stop()
+        outbox.stop()
+        shutdown_pool()
+        stop_writer()
+        close_all()
+
+
+
+if __name__ == "__main__":
+    main()
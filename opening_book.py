@@ -0,0 +1,94 @@
+# opening_book.py
+# Precomputed bot replies for the first plies of a single-player game.
+# The book maps a canonical position code (see bitboard.position_code) to the
+# bot's move. It is stored as a sorted array of little-endian uint64 records,
+# each record being (code << 8) | column.
+#
+# Rebuild with:  python opening_book.py --plies 8 --depth 10
+import os
+import sys
+import argparse
+from array import array
+from bitboard import Board, COLS, canonical_code
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+_book = None
+
+
+def load_book(path=BOOK_FILE):
+    global _book
+    book = {}
+    try:
+        records = array("Q")
+        with open(path, "rb") as f:
+            records.frombytes(f.read())
+        if sys.byteorder == "big":
+            records.byteswap()
+        for record in records:
+            book[record >> 8] = record & 0xFF
+    except OSError:
+        pass
+    _book = book
+    return book
+
+
+def book_move(board):
+    # bot (slot 1) reply for this position, or None when it's not in the book
+    book = _book if _book is not None else load_book()
+    code, mirrored = canonical_code(board)
+    col = book.get(code)
+    if col is None or col >= COLS:
+        return None
+    if mirrored:
+        col = COLS - 1 - col
+    return col if board.can_play(col) else None
+
+
+def build_book(plies, depth, path=BOOK_FILE):
+    # walk every player line up to `plies` plies, following the book's own
+    # reply for the bot, and search each bot-to-move position once
+    from search import best_move, TranspositionTable
+
+    table = TranspositionTable(1 << 20)
+    book = {}
+    frontier = [Board()]
+    for ply in range(plies):
+        next_frontier = []
+        for board in frontier:
+            if ply % 2 == 0:
+                # player to move: expand every column
+                for col in board.valid_moves():
+                    if not board.is_winning_move(col, 0):
+                        child = board.copy()
+                        child.play(col, 0)
+                        next_frontier.append(child)
+            else:
+                code, mirrored = canonical_code(board)
+                if code in book:
+                    continue
+                col, _ = best_move(board, 1, depth, table)
+                book[code] = COLS - 1 - col if mirrored else col
+                if not board.is_winning_move(col, 1):
+                    child = board.copy()
+                    child.play(col, 1)
+                    next_frontier.append(child)
+        frontier = next_frontier
+        print(f"ply {ply + 1}: {len(book)} book positions")
+
+    records = array("Q", sorted((code << 8) | col for code, col in book.items()))
+    if sys.byteorder == "big":
+        records.byteswap()
+    with open(path, "wb") as f:
+        f.write(records.tobytes())
+    return book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the bot's opening book")
+    parser.add_argument("--plies", type=int, default=8, help="book positions up to this many plies")
+    parser.add_argument("--depth", type=int, default=10, help="search depth for each book position")
+    parser.add_argument("--output", default=BOOK_FILE)
+    args = parser.parse_args()
+    book = build_book(args.plies, args.depth, args.output)
+    print(f"wrote {len(book)} positions to {args.output}")
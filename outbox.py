@@ -0,0 +1,165 @@
+# outbox.py
+# Outbound queue for message edits. Edits are keyed by (chat_id, message_id)
+# or inline_message_id: a newer edit for a message that is still waiting
+# replaces the older one, an edit whose content matches what the message
+# already shows is dropped, and edits to the same chat are spaced at least
+# `interval` seconds apart. A small pool of threads sends them, so handlers
+# never wait on editMessageText.
+import heapq
+import itertools
+import threading
+from time import monotonic
+from telebot.apihelper import ApiTelegramException
+from config import OUTBOX_CHAT_INTERVAL_MS, OUTBOX_WORKERS, logger
+from lru_cache import LRUCache
+
+# messages whose last sent content is remembered for the unchanged check
+SENT_DIGESTS_SIZE = 20000
+
+
+def _digest(text, reply_markup, parse_mode):
+    markup = reply_markup.to_json() if reply_markup is not None else None
+    return hash((text, markup, parse_mode))
+
+
+class Outbox:
+    def __init__(self, interval, workers):
+        self.interval = interval
+        self.workers = workers
+        self._bot = None
+        self._pending = {}  # {key: (chat, kwargs, digest)}
+        self._queue = []  # heap of (due, seq, key)
+        self._seq = itertools.count()
+        self._next_free = {}  # {chat: earliest time for its next edit}
+        self._in_flight = set()
+        self._sent = LRUCache(SENT_DIGESTS_SIZE)  # {key: digest of the last sent edit}
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self.counts = {"queued": 0, "coalesced": 0, "unchanged": 0, "sent": 0, "failed": 0}
+
+    def edit_message_text(self, text, chat_id=None, message_id=None, inline_message_id=None,
+                          reply_markup=None, parse_mode=None):
+        if inline_message_id:
+            key = chat = inline_message_id
+        else:
+            key, chat = (chat_id, message_id), chat_id
+        kwargs = {
+            "text": text, "chat_id": chat_id, "message_id": message_id,
+            "inline_message_id": inline_message_id, "reply_markup": reply_markup, "parse_mode": parse_mode,
+        }
+        digest = _digest(text, reply_markup, parse_mode)
+        with self._cond:
+            # while an edit is on the wire the message may not show _sent yet
+            unchanged = key not in self._in_flight and self._sent.get(key, None) == digest
+            if key in self._pending:
+                # the waiting edit is out of date; keep its place in line
+                self.counts["coalesced"] += 1
+                if unchanged:
+                    del self._pending[key]
+                else:
+                    self._pending[key] = (chat, kwargs, digest)
+                return
+            if unchanged:
+                self.counts["unchanged"] += 1
+                return
+            self.counts["queued"] += 1
+            self._pending[key] = (chat, kwargs, digest)
+            self._schedule(key, chat, monotonic())
+
+    def _schedule(self, key, chat, now):
+        due = max(now, self._next_free.get(chat, 0.0))
+        self._next_free[chat] = due + self.interval
+        heapq.heappush(self._queue, (due, next(self._seq), key))
+        self._cond.notify()
+
+    def _take(self):
+        # next (key, entry) that is due, or None once stopped and drained
+        with self._cond:
+            while True:
+                now = monotonic()
+                if self._queue and (self._stopping or self._queue[0][0] <= now):
+                    _, _, key = heapq.heappop(self._queue)
+                    entry = self._pending.get(key)
+                    if entry is None:
+                        continue
+                    if key in self._in_flight:
+                        # the previous edit of this message is still on the wire
+                        heapq.heappush(self._queue, (now + self.interval, next(self._seq), key))
+                        if self._stopping:
+                            self._cond.wait(0.05)
+                        continue
+                    del self._pending[key]
+                    self._in_flight.add(key)
+                    self._prune(now)
+                    return key, entry
+                if self._stopping and not self._queue:
+                    return None
+                self._cond.wait(self._queue[0][0] - now if self._queue else None)
+
+    def _prune(self, now):
+        if len(self._next_free) > 4 * len(self._pending) + 1024:
+            self._next_free = {chat: t for chat, t in self._next_free.items() if t > now}
+
+    def _send(self, key, entry):
+        chat, kwargs, digest = entry
+        outcome = "sent"
+        try:
+            self._bot.edit_message_text(**kwargs)
+        except ApiTelegramException as e:
+            if e.error_code == 429:
+                outcome = "retry"
+                retry_after = (e.result_json.get("parameters") or {}).get("retry_after", 1)
+            elif "message is not modified" not in e.description:
+                outcome = "failed"
+                logger.error(f"Error editing message {key}: {e}")
+        except Exception as e:
+            outcome = "failed"
+            logger.error(f"Error editing message {key}: {e}")
+        with self._cond:
+            self._in_flight.discard(key)
+            if outcome == "sent":
+                self._sent.put(key, digest)
+                self.counts["sent"] += 1
+            elif outcome == "failed":
+                self.counts["failed"] += 1
+            else:
+                # retry after the flood wait unless a newer edit took its place
+                self._pending.setdefault(key, entry)
+                self._next_free[chat] = monotonic() + retry_after
+                self._schedule(key, chat, monotonic())
+
+    def _run(self):
+        while True:
+            item = self._take()
+            if item is None:
+                return
+            self._send(*item)
+
+    def start(self, bot):
+        self._bot = bot
+        if self._threads:
+            return
+        self._stopping = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"outbox-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        # send what is still waiting, then stop the senders
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counts, pending=len(self._pending))
+
+
+outbox = Outbox(OUTBOX_CHAT_INTERVAL_MS / 1000, OUTBOX_WORKERS)
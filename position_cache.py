@@ -0,0 +1,39 @@
+# position_cache.py
+# Process-wide LRU cache of bot moves, shared by every game. Keys are the
+# mirror-canonical position code plus the difficulty, so a position and its
+# left-right mirror share one entry.
+from bitboard import COLS, canonical_code
+from config import POSITION_CACHE_SIZE
+from lru_cache import LRUCache
+
+
+class PositionCache:
+    def __init__(self, max_size):
+        self._cache = LRUCache(max_size)
+
+    def get(self, board, difficulty):
+        # (col, score) for the bot in this position, or None on a miss.
+        # col may be None for entries that only record "no special move".
+        code, mirrored = canonical_code(board)
+        entry = self._cache.get((code, difficulty), None)
+        if entry is None:
+            return None
+        col, score = entry
+        if mirrored and col is not None:
+            col = COLS - 1 - col
+        return col, score
+
+    def put(self, board, difficulty, col, score=None):
+        code, mirrored = canonical_code(board)
+        if mirrored and col is not None:
+            col = COLS - 1 - col
+        self._cache.put((code, difficulty), (col, score))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+move_cache = PositionCache(POSITION_CACHE_SIZE)
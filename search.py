@@ -0,0 +1,235 @@
+# search.py
+# Negamax search with alpha-beta pruning and a transposition table, used by
+# the hard difficulty in game_logic.bot_move. Leaves at the depth limit are
+# scored by evaluation.evaluate.
+import time
+from bitboard import CELL_COUNT
+from evaluation import evaluate
+
+# center-first move ordering
+MOVE_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+# a win is worth WIN_SCORE minus the number of pieces on the board, so faster
+# wins (and slower losses) are preferred
+WIN_SCORE = 1000
+
+# scores at or beyond this are proven wins/losses
+DECIDED_SCORE = WIN_SCORE - CELL_COUNT
+
+TT_SIZE = 1 << 18  # must be a power of two
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# xor-ed into the key so the same stones with a different side to move hash apart
+SIDE_KEY = 0x9E3779B97F4A7C15
+
+
+class TranspositionTable:
+    # fixed-size, always-replace table; each slot holds one
+    # (key, depth, flag, score, move) tuple so a write is a single assignment
+    __slots__ = ("mask", "entries")
+
+    def __init__(self, size=TT_SIZE):
+        self.mask = size - 1
+        self.entries = [None] * size
+
+    def get(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def put(self, key, depth, flag, score, move):
+        self.entries[key & self.mask] = (key, depth, flag, score, move)
+
+    def clear(self):
+        self.entries = [None] * (self.mask + 1)
+
+
+tt = TranspositionTable()
+# non-heuristic (solver-only) entries, for the endgame solver
+solver_tt = TranspositionTable()
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def negamax(board, slot, depth, alpha, beta, table, deadline=None):
+    # score of the position for `slot`, who is to move
+    moves = [col for col in MOVE_ORDER if board.can_play(col)]
+    if not moves:
+        return 0
+
+    # immediate win
+    for col in moves:
+        if board.is_winning_move(col, slot):
+            return WIN_SCORE - board.moves - 1
+    if board.moves + 1 >= CELL_COUNT:
+        return 0
+    if depth <= 1:
+        return evaluate(board, slot)
+    if deadline is not None and time.monotonic() > deadline:
+        raise SearchTimeout
+
+    key = board.key ^ (SIDE_KEY if slot else 0)
+    alpha_orig = alpha
+    entry = table.get(key)
+    if entry is not None:
+        if entry[1] >= depth:
+            flag, score = entry[2], entry[3]
+            if flag == EXACT:
+                return score
+            if flag == LOWER and score > alpha:
+                alpha = score
+            elif flag == UPPER and score < beta:
+                beta = score
+            if alpha >= beta:
+                return score
+        # try the stored best move first
+        if entry[4] in moves:
+            moves.remove(entry[4])
+            moves.insert(0, entry[4])
+
+    best_score = -WIN_SCORE
+    best_move = moves[0]
+    other = slot ^ 1
+    for col in moves:
+        board.play(col, slot)
+        score = -negamax(board, other, depth - 1, -beta, -alpha, table, deadline)
+        board.undo(col, slot)
+        if score > best_score:
+            best_score = score
+            best_move = col
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+    if best_score <= alpha_orig:
+        flag = UPPER
+    elif best_score >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    table.put(key, depth, flag, best_score, best_move)
+    return best_score
+
+
+def best_move(board, slot, depth, table=None, deadline=None, first=None):
+    # returns (col, score) for `slot` to move, or (None, 0) on a full board.
+    # Raises SearchTimeout past the deadline, possibly leaving moves on the
+    # board, so timed searches must run on a copy.
+    if table is None:
+        table = tt
+    moves = [col for col in MOVE_ORDER if board.can_play(col)]
+    if not moves:
+        return None, 0
+    if first in moves:
+        moves.remove(first)
+        moves.insert(0, first)
+    best_col = moves[0]
+    best_score = -WIN_SCORE - 1
+    alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+    other = slot ^ 1
+    for col in moves:
+        if board.is_winning_move(col, slot):
+            score = WIN_SCORE - board.moves - 1
+        else:
+            board.play(col, slot)
+            score = -negamax(board, other, depth - 1, -beta, -alpha, table, deadline)
+            board.undo(col, slot)
+        if score > best_score:
+            best_score = score
+            best_col = col
+            if score > alpha:
+                alpha = score
+    return best_col, best_score
+
+
+def solve(board, slot, budget=None):
+    # exact search to the end of the game, memoised in its own table.
+    # Returns (col, score), or None if the budget (seconds) runs out first.
+    deadline = None if budget is None else time.monotonic() + budget
+    try:
+        return best_move(board.copy(), slot, CELL_COUNT - board.moves, solver_tt, deadline)
+    except SearchTimeout:
+        return None
+
+
+def iterative_deepening(board, slot, budget, table=None):
+    # deepen one ply at a time until the time budget (seconds) runs out and
+    # return the result of the deepest completed iteration
+    deadline = time.monotonic() + budget
+    max_depth = CELL_COUNT - board.moves
+    col, score = best_move(board, slot, 1, table)
+    for depth in range(2, max_depth + 1):
+        if abs(score) >= DECIDED_SCORE:
+            break
+        try:
+            col, score = best_move(board.copy(), slot, depth, table, deadline, first=col)
+        except SearchTimeout:
+            break
+    return col, score
+
+
+# ---------- root-parallel search ----------
+def score_root_move(board, col, slot, deadline, bounds=None, base=0):
+    # Iterative deepening on a single root move, run in a worker process.
+    # bounds[base + depth] is the best exact score any sibling root move has
+    # reached at that depth, shared between workers so they prune against
+    # each other. Returns ({depth: (score, exact)}, final) where final means
+    # deeper iterations cannot change the score.
+    if board.is_winning_move(col, slot):
+        return {1: (WIN_SCORE - board.moves - 1, True)}, True
+    child = board.copy()
+    child.play(col, slot)
+    other = slot ^ 1
+    max_depth = CELL_COUNT - board.moves
+    results = {}
+    for depth in range(1, max_depth + 1):
+        alpha = -WIN_SCORE - 1 if bounds is None else bounds[base + depth]
+        try:
+            # the first iteration always completes
+            score = -negamax(child.copy(), other, depth - 1, -WIN_SCORE - 1, -alpha, tt,
+                             deadline if depth > 1 else None)
+        except SearchTimeout:
+            return results, False
+        exact = score > alpha
+        results[depth] = (score, exact)
+        if exact and bounds is not None:
+            with bounds.get_lock():
+                if score > bounds[base + depth]:
+                    bounds[base + depth] = score
+        if exact and abs(score) >= DECIDED_SCORE:
+            return results, True
+    return results, True
+
+
+def combine_root_scores(move_results):
+    # move_results: {col: (results, final)} from score_root_move. Compares
+    # the moves at the deepest depth every one of them completed; final
+    # moves keep their last score at any depth.
+    depth = None
+    deepest = 0
+    for results, final in move_results.values():
+        reached = max(results, default=0)
+        deepest = max(deepest, reached)
+        if not final:
+            depth = reached if depth is None else min(depth, reached)
+    if depth is None:
+        depth = deepest
+
+    best_col, best = None, None
+    for col in MOVE_ORDER:
+        if col not in move_results:
+            continue
+        results, final = move_results[col]
+        if depth in results:
+            entry = results[depth]
+        elif final and results:
+            entry = results[max(results)]
+        else:
+            continue
+        if best is None or entry > best:
+            best_col, best = col, entry
+    return best_col
@@ -0,0 +1,47 @@
+# sweeper.py
+# Background thread that evicts games nobody has touched for GAME_TTL
+# seconds and tells the players the game expired.
+import threading
+from time import time, sleep
+from config import GAME_TTL, GAME_SWEEP_INTERVAL, logger
+from game_registry import pop_idle_games
+from game_logic import end_game_markup
+from outbox import outbox
+from turn_timer import turn_timer
+
+EXPIRED_MESSAGE = "⌛ این بازی به دلیل عدم فعالیت منقضی شد."
+
+
+def sweep_once(bot, now=None):
+    expired = pop_idle_games(GAME_TTL, time() if now is None else now)
+    for game_id, state in expired:
+        try:
+            if state.mode == "single":
+                if state.message_id:
+                    outbox.edit_message_text(EXPIRED_MESSAGE, state.chat_id, state.message_id, reply_markup=end_game_markup())
+                continue
+            turn_timer.cancel(game_id)
+            # a turn timer wake-up already past its game check finishes its
+            # edit first, so the expiry notice is the last one queued
+            with state.lock:
+                if state.chat_id and state.message_id:
+                    outbox.edit_message_text(EXPIRED_MESSAGE, state.chat_id, state.message_id)
+                elif state.inline_message_id:
+                    outbox.edit_message_text(EXPIRED_MESSAGE, inline_message_id=state.inline_message_id)
+        except Exception as e:
+            logger.error(f"Error expiring game {game_id}: {e}")
+    return len(expired)
+
+
+def start_sweeper(bot):
+    def _run():
+        while True:
+            sleep(GAME_SWEEP_INTERVAL)
+            try:
+                sweep_once(bot)
+            except Exception as e:
+                logger.error(f"Error in game sweeper: {e}")
+
+    thread = threading.Thread(target=_run, name="game-sweeper", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,171 @@
+# telegram_api.py
+# HTTP layer under telebot's sync client. Every thread shares one pooled
+# keep-alive session instead of telebot's per-thread ones, timeouts are
+# bounded, short flood waits (429) and transient server errors are retried,
+# and each API method gets call / error / latency counters. install_async()
+# applies the same retries, limits and counters to AsyncTeleBot's requests.
+import asyncio
+import threading
+import time
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from telebot import apihelper, asyncio_helper
+from config import (
+    TELEGRAM_POOL_SIZE, TELEGRAM_CONNECT_TIMEOUT, TELEGRAM_READ_TIMEOUT, TELEGRAM_MAX_RETRIES, logger
+)
+
+RETRY_STATUSES = (500, 502, 503, 504)
+# longer flood waits go back to the caller (the outbox and broadcasts
+# reschedule instead of holding a thread)
+MAX_RETRY_AFTER = 5
+# methods that are safe to repeat after a read timeout or a dropped
+# connection; a repeated sendMessage could post the message twice
+IDEMPOTENT_PREFIXES = ("get", "edit", "answer", "set", "delete")
+
+
+class ApiStats:
+    def __init__(self):
+        self._methods = {}  # {method: [calls, errors, total_seconds, max_seconds]}
+        self._lock = threading.Lock()
+
+    def record(self, method, seconds, ok):
+        with self._lock:
+            entry = self._methods.get(method)
+            if entry is None:
+                entry = self._methods[method] = [0, 0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += not ok
+            entry[2] += seconds
+            entry[3] = max(entry[3], seconds)
+
+    def snapshot(self):
+        # {method: {"calls", "errors", "avg_ms", "max_ms"}}
+        with self._lock:
+            return {
+                method: {
+                    "calls": calls,
+                    "errors": errors,
+                    "avg_ms": total / calls * 1000,
+                    "max_ms": longest * 1000,
+                }
+                for method, (calls, errors, total, longest) in self._methods.items()
+            }
+
+
+stats = ApiStats()
+_session = None
+
+
+def _retry_delay(status, retry_after, attempt):
+    # seconds to wait before retrying a response with this status, or None
+    if status == 429:
+        return retry_after if retry_after <= MAX_RETRY_AFTER else None
+    if status in RETRY_STATUSES:
+        return 0.5 * 2 ** attempt
+    return None
+
+
+def _retry_after(response):
+    if response.status_code != 429:
+        return 1
+    try:
+        return response.json().get("parameters", {}).get("retry_after", 1)
+    except ValueError:
+        return 1
+
+
+def _never_sent(error):
+    # did the connection fail before the request could be sent?
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def _send(method, url, **kwargs):
+    name = url.rsplit("/", 1)[-1]
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            response = _session.request(method, url, **kwargs)
+        except requests.exceptions.ReadTimeout:
+            stats.record(name, time.monotonic() - started, False)
+            if attempt >= TELEGRAM_MAX_RETRIES or not name.startswith(IDEMPOTENT_PREFIXES):
+                raise
+            delay = 0.5 * 2 ** attempt
+        except requests.exceptions.ConnectionError as e:
+            # a reset after the request went out may mean it was handled, so
+            # only connect-phase failures are safe to repeat for any method
+            stats.record(name, time.monotonic() - started, False)
+            if attempt >= TELEGRAM_MAX_RETRIES or not (_never_sent(e) or name.startswith(IDEMPOTENT_PREFIXES)):
+                raise
+            delay = 0.5 * 2 ** attempt
+        else:
+            stats.record(name, time.monotonic() - started, response.status_code == 200)
+            delay = _retry_delay(response.status_code, _retry_after(response), attempt)
+            if delay is None or attempt >= TELEGRAM_MAX_RETRIES:
+                return response
+            logger.debug(f"Retrying {name} after HTTP {response.status_code}")
+        time.sleep(delay)
+        attempt += 1
+
+
+def install():
+    # route telebot's sync requests through the shared session
+    global _session
+    if _session is not None:
+        return
+    _session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=TELEGRAM_POOL_SIZE)
+    _session.mount("https://", adapter)
+    _session.mount("http://", adapter)
+    apihelper.CONNECT_TIMEOUT = TELEGRAM_CONNECT_TIMEOUT
+    apihelper.READ_TIMEOUT = TELEGRAM_READ_TIMEOUT
+    apihelper.CUSTOM_REQUEST_SENDER = _send
+
+
+_aio_request = asyncio_helper._process_request
+
+
+async def _send_async(token, url, method="get", params=None, files=None, **kwargs):
+    # _send for AsyncTeleBot, around telebot's own aiohttp request; uploads
+    # are never repeated since their files were already read
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            # telebot pops the timeout out of params, so each try gets a copy
+            result = await _aio_request(token, url, method, dict(params) if params else params, files, **kwargs)
+        except asyncio_helper.RequestTimeout as e:
+            stats.record(url, time.monotonic() - started, False)
+            never_sent = isinstance(e.__cause__, aiohttp.ClientConnectorError)
+            if attempt >= TELEGRAM_MAX_RETRIES or files or not (never_sent or url.startswith(IDEMPOTENT_PREFIXES)):
+                raise
+            delay = 0.5 * 2 ** attempt
+        except asyncio_helper.ApiException as e:
+            stats.record(url, time.monotonic() - started, False)
+            if isinstance(e, asyncio_helper.ApiTelegramException):
+                status = e.error_code
+                retry_after = e.result_json.get("parameters", {}).get("retry_after", 1)
+            else:
+                status, retry_after = e.result.status, 1
+            delay = _retry_delay(status, retry_after, attempt)
+            if delay is None or attempt >= TELEGRAM_MAX_RETRIES or files:
+                raise
+            logger.debug(f"Retrying {url} after HTTP {status}")
+        else:
+            stats.record(url, time.monotonic() - started, True)
+            return result
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def install_async():
+    # route AsyncTeleBot's requests through _send_async, with the same
+    # connection limit and timeouts as the sync session
+    asyncio_helper.REQUEST_LIMIT = TELEGRAM_POOL_SIZE
+    asyncio_helper.REQUEST_TIMEOUT = TELEGRAM_CONNECT_TIMEOUT + TELEGRAM_READ_TIMEOUT
+    asyncio_helper._process_request = _send_async
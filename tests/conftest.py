@@ -0,0 +1,7 @@
+# tests/conftest.py
+# The modules live at the repo root and config.py exits without a TOKEN.
+import os
+import sys
+
+os.environ.setdefault("TOKEN", "test-token")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,58 @@
+# tests/test_game_codec.py
+import pytest
+from game_codec import encode_game, decode_game, new_game_key, callback_data, parse_callback_data, is_stateless_data
+from game_logic import drop_piece
+from game_state import MultiGame
+
+MESSAGE = "-1001234567890:4242"
+
+
+def sample_game():
+    state = MultiGame(123456789, 2 ** 62 + 5, "A", "B")
+    for col, player in ((3, "player1"), (3, "player2"), (0, "player1"), (6, "player2")):
+        drop_piece(state.board, col, player)
+    state.turn = "player2"
+    state.last_move_time = 1_700_000_000
+    return state
+
+
+def test_round_trip():
+    state = sample_game()
+    state.rematch.append(state.player2_id)
+    key = new_game_key()
+    decoded, game_key = decode_game(encode_game(state, key, MESSAGE), MESSAGE)
+    assert game_key == key
+    assert (decoded.player1_id, decoded.player2_id) == (state.player1_id, state.player2_id)
+    assert decoded.board.masks == state.board.masks
+    assert decoded.board.heights == state.board.heights
+    assert decoded.turn == "player2"
+    assert decoded.last_move_time == state.last_move_time
+    assert decoded.rematch == [state.player2_id]
+
+
+def test_tampered_token_is_rejected():
+    token = encode_game(sample_game(), new_game_key(), MESSAGE)
+    for i in range(len(token)):
+        # change the high bits too: the low bits of the last character are padding
+        swapped = "w" if token[i] in "ABCDEFGHIJKLMNOP" else "A"
+        assert decode_game(token[:i] + swapped + token[i + 1:], MESSAGE) is None
+
+
+def test_token_is_bound_to_its_message():
+    token = encode_game(sample_game(), new_game_key(), MESSAGE)
+    assert decode_game(token, "-1001234567890:4243") is None
+    assert decode_game(token, "AgAAAKnQAgDOmOHCfTTHIg") is None
+
+
+@pytest.mark.parametrize("token", ["", "abc", "!!!!", "A" * 54, "A" * 80])
+def test_garbage_is_rejected(token):
+    assert decode_game(token, MESSAGE) is None
+
+
+def test_callback_data_fits_telegram_limit():
+    token = encode_game(sample_game(), new_game_key(), MESSAGE)
+    for action in ("0", "6", "s", "r"):
+        data = callback_data(action, token)
+        assert len(data.encode()) <= 64
+        assert is_stateless_data(data)
+        assert parse_callback_data(data) == (action, token)
@@ -0,0 +1,90 @@
+# tests/test_timer_wheel.py
+import random
+from timer_wheel import TimerWheel
+
+
+def fire_ticks(wheel, until):
+    # {key: tick it fired at}, advancing one tick at a time
+    fired = {}
+    for tick in range(1, until + 1):
+        for key in wheel.advance(tick):
+            fired[key] = tick
+    return fired
+
+
+def test_expires_on_its_tick_at_every_level():
+    # 4 slots x 3 levels: level 0 covers 4 ticks, level 1 16, level 2 64
+    wheel = TimerWheel(1, 0, slots=4, levels=3)
+    for when in (1, 3, 4, 7, 15, 16, 33, 63, 64, 100, 250):
+        wheel.schedule(when, when)
+    assert fire_ticks(wheel, 300) == {when: when for when in (1, 3, 4, 7, 15, 16, 33, 63, 64, 100, 250)}
+    assert len(wheel) == 0
+
+
+def test_past_deadline_fires_on_the_next_tick():
+    wheel = TimerWheel(1, 10, slots=4, levels=2)
+    wheel.schedule("late", 3)
+    assert wheel.advance(10) == []
+    assert wheel.advance(11) == ["late"]
+
+
+def test_advance_across_many_ticks_at_once():
+    wheel = TimerWheel(0.1, 0, slots=8, levels=2)
+    wheel.schedule("a", 0.5)
+    wheel.schedule("b", 5.0)
+    assert wheel.advance(1.0) == ["a"]
+    assert wheel.advance(4.9) == []
+    assert wheel.advance(5.0) == ["b"]
+
+
+def test_reschedule_replaces_the_deadline_across_levels():
+    wheel = TimerWheel(1, 0, slots=4, levels=3)
+    wheel.schedule("sooner", 50)
+    wheel.schedule("sooner", 2)
+    wheel.schedule("later", 3)
+    wheel.schedule("later", 40)
+    assert fire_ticks(wheel, 100) == {"sooner": 2, "later": 40}
+
+
+def test_cancel_at_every_level():
+    wheel = TimerWheel(1, 0, slots=4, levels=3)
+    for when in (2, 9, 30, 90):
+        wheel.schedule(when, when)
+    for when in (2, 9, 30, 90):
+        wheel.cancel(when)
+    wheel.cancel("never scheduled")
+    assert len(wheel) == 0
+    assert fire_ticks(wheel, 120) == {}
+
+
+def test_cancel_after_cascading_down():
+    wheel = TimerWheel(1, 0, slots=4, levels=3)
+    wheel.schedule("key", 40)
+    fire_ticks(wheel, 36)  # moved down to level 0 by now
+    wheel.cancel("key")
+    assert fire_ticks(wheel, 60) == {}
+
+
+def test_matches_a_plain_dict_of_deadlines():
+    rng = random.Random(7)
+    wheel = TimerWheel(1, 0, slots=8, levels=3)
+    expected = {}
+    fired = {}
+    for tick in range(1, 3000):
+        for _ in range(rng.randrange(4)):
+            key = rng.randrange(200)
+            action = rng.random()
+            if action < 0.7:
+                when = tick + rng.randrange(1, 800)
+                wheel.schedule(key, when)
+                expected[key] = when
+            elif action < 0.85:
+                wheel.cancel(key)
+                expected.pop(key, None)
+        for key in wheel.advance(tick):
+            fired.setdefault(tick, set()).add(key)
+        due = {key for key, when in expected.items() if when <= tick}
+        for key in due:
+            del expected[key]
+        assert fired.get(tick, set()) == due
+    assert len(wheel) == len(expected)
@@ -0,0 +1,74 @@
+# timer_wheel.py
+# Hierarchical timer wheel. Level 0 has `slots` buckets of one tick each and
+# every bucket of level n spans a full turn of level n - 1, so `levels`
+# wheels cover slots**levels ticks. Scheduling and cancelling are O(1) and
+# advancing one tick only touches one bucket, however many timers are
+# pending. An entry is placed on the lowest level that reaches its expiry
+# and moves down a level each time its bucket comes around.
+#
+# Each key has at most one live deadline: scheduling it again replaces the
+# old one and cancel() forgets it. Stale bucket entries are skipped when
+# reached instead of being searched for.
+
+
+class TimerWheel:
+    def __init__(self, tick, now, slots=64, levels=3):
+        self.tick = tick
+        self._slots = slots
+        self._spans = [slots ** level for level in range(levels)]  # ticks per bucket
+        self._wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self._current = int(now / tick)  # last tick already processed
+        self._deadlines = {}  # {key: expiry tick}
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def schedule(self, key, when):
+        # fire `key` once the wheel is advanced past `when` (seconds)
+        expiry = max(int(when / self.tick), self._current + 1)
+        self._deadlines[key] = expiry
+        self._place(key, expiry)
+
+    def cancel(self, key):
+        self._deadlines.pop(key, None)
+
+    def advance(self, now):
+        # process every tick up to `now`; returns the keys that expired
+        fired = []
+        target = int(now / self.tick)
+        while self._current < target:
+            self._current += 1
+            # cascade higher levels whose bucket starts at this tick, top down
+            for level in range(len(self._spans) - 1, 0, -1):
+                span = self._spans[level]
+                if self._current % span == 0:
+                    bucket = self._wheels[level][self._current // span % self._slots]
+                    entries, bucket[:] = bucket[:], []
+                    for key, expiry in entries:
+                        if self._deadlines.get(key) == expiry:
+                            self._place(key, expiry)
+            bucket = self._wheels[0][self._current % self._slots]
+            entries, bucket[:] = bucket[:], []
+            for key, expiry in entries:
+                if self._deadlines.get(key) != expiry:
+                    continue
+                if expiry <= self._current:
+                    del self._deadlines[key]
+                    fired.append(key)
+                else:
+                    self._place(key, expiry)
+        return fired
+
+    def _place(self, key, expiry):
+        delta = expiry - self._current
+        level = 0
+        while level < len(self._spans) - 1 and delta >= self._spans[level + 1]:
+            level += 1
+        # deadlines beyond the top wheel wait in its farthest bucket and are
+        # placed again when that bucket comes around
+        top_range = self._spans[level] * self._slots
+        if delta >= top_range:
+            expiry_slot = (self._current + top_range - 1) // self._spans[level]
+        else:
+            expiry_slot = expiry // self._spans[level]
+        self._wheels[level][expiry_slot % self._slots].append((key, expiry))
@@ -0,0 +1,131 @@
+# turn_timer.py
+# Multiplayer turn deadlines. One thread drives a timer wheel holding the
+# next wake-up of every live multiplayer game: a countdown refresh every
+# MULTI_COUNTDOWN_INTERVAL seconds, or the end of the turn, when the turn
+# passes to the opponent. A player who lets MULTI_MAX_MISSED_TURNS turns
+# in a row run out forfeits. The handlers call schedule() whenever they show
+# a board, which replaces the game's previous wake-up, and cancel() when a
+# game ends. Countdown refreshes share a per-second budget and are skipped
+# while the outbox is backed up, so they never hold up move edits; turn
+# changes and forfeits are always sent.
+import threading
+from time import time
+from config import (
+    TURN_TIMER_TICK_MS, MULTI_COUNTDOWN_INTERVAL, MULTI_MAX_MISSED_TURNS, MULTI_COUNTDOWN_RATE,
+    MULTI_COUNTDOWN_MAX_PENDING, logger
+)
+from game_registry import get_game, remove_game
+from handlers.views import multi_board_view
+from outbox import outbox
+from timer_wheel import TimerWheel
+
+TURN_SECONDS = 10
+
+
+def turn_time_left(state, now):
+    return max(0, TURN_SECONDS - int(now - state.last_move_time))
+
+
+def _edit(state, text, markup=None):
+    if state.chat_id and state.message_id:
+        outbox.edit_message_text(text, state.chat_id, state.message_id, reply_markup=markup, parse_mode="Markdown")
+    elif state.inline_message_id:
+        outbox.edit_message_text(text, inline_message_id=state.inline_message_id, reply_markup=markup, parse_mode="Markdown")
+
+
+class TurnTimer:
+    def __init__(self, tick):
+        self._wheel = TimerWheel(tick, time())
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._second = 0  # the second the countdown budget was counted in
+        self._refreshes = 0
+
+    def schedule(self, game_id, state, now=None):
+        now = time() if now is None else now
+        wake = state.last_move_time + TURN_SECONDS
+        if MULTI_COUNTDOWN_INTERVAL > 0:
+            wake = min(wake, now + MULTI_COUNTDOWN_INTERVAL)
+        with self._lock:
+            self._wheel.schedule(game_id, wake)
+
+    def cancel(self, game_id):
+        with self._lock:
+            self._wheel.cancel(game_id)
+
+    def pending(self):
+        with self._lock:
+            return len(self._wheel)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="turn-timer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self._wheel.tick):
+            with self._lock:
+                due = self._wheel.advance(time())
+            for game_id in due:
+                try:
+                    self.wake(game_id)
+                except Exception as e:
+                    logger.error(f"Error in turn timer for game {game_id}: {e}")
+
+    def _countdown_allowed(self, now):
+        if outbox.stats()["pending"] > MULTI_COUNTDOWN_MAX_PENDING:
+            return False
+        if MULTI_COUNTDOWN_RATE <= 0:
+            return True
+        with self._lock:
+            second = int(now)
+            if second != self._second:
+                self._second, self._refreshes = second, 0
+            if self._refreshes >= MULTI_COUNTDOWN_RATE:
+                return False
+            self._refreshes += 1
+            return True
+
+    def wake(self, game_id, now=None):
+        # the game may have ended, or a move may have moved its deadline
+        # since this wake-up was scheduled, so decide from its current state
+        state = get_game(game_id)
+        if state is None or state.mode != "multi":
+            return
+        now = time() if now is None else now
+        # clicks change the turn under the same lock; re-check the game once
+        # it is held, as a move or surrender may have just ended it
+        with state.lock:
+            if get_game(game_id) is not state:
+                return
+            if now >= state.last_move_time + TURN_SECONDS:
+                slot = 0 if state.turn == "player1" else 1
+                state.missed_turns[slot] += 1
+                if state.missed_turns[slot] >= MULTI_MAX_MISSED_TURNS:
+                    if not remove_game(game_id, state):
+                        return
+                    loser_name, winner_name = (
+                        (state.player1_name, state.player2_name) if slot == 0 else (state.player2_name, state.player1_name)
+                    )
+                    _edit(state, f"⌛ وقت {loser_name} {MULTI_MAX_MISSED_TURNS} بار تموم شد و بازی رو واگذار کرد!\n\nبرنده: {winner_name} 🎉")
+                    return
+                state.turn = "player2" if state.turn == "player1" else "player1"
+                state.last_move_time = now
+            elif not self._countdown_allowed(now):
+                # the next refresh or the turn change shows the right time
+                self.schedule(game_id, state, now)
+                return
+            _edit(state, *multi_board_view(state, turn_time_left(state, now)))
+            self.schedule(game_id, state, now)
+
+
+turn_timer = TurnTimer(TURN_TIMER_TICK_MS / 1000)
@@ -1,11 +1,9 @@
 # utils.py
+import threading
 from time import time
 from datetime import datetime
 from pytz import timezone
-from config import logger
-
-# message tracker for rate limiting: {user_id: {'count', 'last_time', 'temp_block_until'}}
-message_tracker = {}
+from config import logger, RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_BLOCK_SECONDS
 
 # bot start time (set on startup)
 bot_start_time = None
@@ -27,22 +25,66 @@ def is_message_valid(message):
         return False
     return True
 
-def check_rate_limit(user_id):
-    current_time = time()
-    if user_id not in message_tracker:
-        message_tracker[user_id] = {'count': 0, 'last_time': current_time, 'temp_block_until': 0}
+# tokens each kind of update costs; inline queries fire on every keystroke
+RATE_LIMIT_COSTS = {"command": 1.0, "move": 0.5, "inline": 0.25}
+
+
+class RateLimiter:
+    # Per-user token buckets refilled at `rate` tokens per second up to
+    # `burst`. A request that finds too few tokens blocks the user for
+    # `block_seconds`. Buckets are kept in last-access order, and one idle
+    # for idle_ttl is full and unblocked again, so it is dropped: memory
+    # grows with active users only.
+    def __init__(self, rate, burst, block_seconds):
+        self.rate = rate
+        self.burst = burst
+        self.block_seconds = block_seconds
+        self.idle_ttl = block_seconds + burst / rate
+        self._buckets = {}  # {user_id: [tokens, last_time, blocked_until]}, oldest access first
+        self._lock = threading.Lock()
+
+    def check(self, user_id, cost=1.0, now=None):
+        # (allowed, seconds the user stays blocked)
+        now = time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            bucket = self._buckets.pop(user_id, None)
+            if bucket is None:
+                bucket = [self.burst, now, 0.0]
+            self._buckets[user_id] = bucket
+            tokens, last_time, blocked_until = bucket
+            if now < blocked_until:
+                # the refill clock keeps running through the block
+                return False, blocked_until - now
+            bucket[1] = now
+            tokens = min(self.burst, tokens + (now - last_time) * self.rate)
+            if tokens < cost:
+                bucket[0] = tokens
+                bucket[2] = now + self.block_seconds
+                return False, self.block_seconds
+            bucket[0] = tokens - cost
+            return True, 0
+
+    def _expire(self, now):
+        stale = []
+        for user_id, bucket in self._buckets.items():
+            if now - bucket[1] < self.idle_ttl:
+                break
+            stale.append(user_id)
+        for user_id in stale:
+            del self._buckets[user_id]
+
+    def __len__(self):
+        return len(self._buckets)
 
-    if current_time < message_tracker[user_id]['temp_block_until']:
-        remaining = int(message_tracker[user_id]['temp_block_until'] - current_time)
-        return False, f"شما به دلیل ارسال پیام زیاد تا {remaining} ثانیه نمی‌تونید پیام بفرستید 😕"
 
-    if current_time - message_tracker[user_id]['last_time'] > 1:
-        message_tracker[user_id]['count'] = 0
-        message_tracker[user_id]['last_time'] = current_time
+rate_limiter = RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_BLOCK_SECONDS)
 
-    message_tracker[user_id]['count'] += 1
-    if message_tracker[user_id]['count'] > 2:
-        message_tracker[user_id]['temp_block_until'] = current_time + 30
-        return False, "شما بیش از حد پیام فرستادید! تا ۳۰ ثانیه نمی‌تونید پیام بفرستید 😕"
 
-    return True, ""
+def check_rate_limit(user_id, action="command"):
+    allowed, blocked_for = rate_limiter.check(user_id, RATE_LIMIT_COSTS[action])
+    if allowed:
+        return True, ""
+    if blocked_for >= rate_limiter.block_seconds:
+        return False, f"شما بیش از حد پیام فرستادید! تا {int(rate_limiter.block_seconds)} ثانیه نمی‌تونید پیام بفرستید 😕"
+    return False, f"شما به دلیل ارسال پیام زیاد تا {int(blocked_for)} ثانیه نمی‌تونید پیام بفرستید 😕"
@@ -0,0 +1,108 @@
+# webhook.py
+# Webhook ingestion. A threaded HTTP server accepts Telegram's POSTs, checks
+# the secret token header and puts the updates on a bounded queue; one
+# dispatcher thread hands them to the handlers registered on the bot, so the
+# HTTP threads answer right away. When the queue is full the POST gets a 503
+# and Telegram delivers the update again later.
+#
+# Local test: run with BOT_MODE=webhook and no WEBHOOK_URL, then
+#   curl -H "X-Telegram-Bot-Api-Secret-Token: $WEBHOOK_SECRET" \
+#        -d @update.json http://127.0.0.1:8443/telegram
+import hmac
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from telebot import types
+from config import logger
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+MAX_BODY_BYTES = 1 << 20
+# updates handed to bot.process_new_updates in one call
+DISPATCH_BATCH = 100
+
+
+class WebhookServer:
+    def __init__(self, bot, host, port, path, secret, queue_size):
+        self.bot = bot
+        self.path = path
+        self.secret = secret.encode()
+        self.updates = queue.Queue(maxsize=queue_size)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._threads = []
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.send_response_only(server.handle_post(self.path, self.headers, self.rfile))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def handle_post(self, path, headers, body):
+        # HTTP status for one POST
+        if path != self.path:
+            return 404
+        token = headers.get(SECRET_HEADER, "").encode()
+        if not hmac.compare_digest(token, self.secret):
+            return 403
+        try:
+            length = int(headers.get("Content-Length", 0))
+        except ValueError:
+            return 400
+        if length <= 0 or length > MAX_BODY_BYTES:
+            return 400
+        try:
+            update = types.Update.de_json(json.loads(body.read(length)))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Rejected malformed webhook update: {e}")
+            return 400
+        try:
+            self.updates.put_nowait(update)
+        except queue.Full:
+            return 503
+        return 200
+
+    def _dispatch(self):
+        stopping = False
+        while not stopping:
+            batch = [self.updates.get()]
+            while len(batch) < DISPATCH_BATCH:
+                try:
+                    batch.append(self.updates.get_nowait())
+                except queue.Empty:
+                    break
+            if any(update is None for update in batch):
+                # stop() was called: finish what is queued, then exit
+                stopping = True
+                batch = [update for update in batch if update is not None]
+            if not batch:
+                continue
+            try:
+                self.bot.process_new_updates(batch)
+            except Exception as e:
+                logger.error(f"Error dispatching webhook updates: {e}")
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._httpd.serve_forever, name="webhook-http", daemon=True),
+            threading.Thread(target=self._dispatch, name="webhook-dispatch", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def wait(self):
+        for thread in self._threads:
+            thread.join()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self.updates.put(None)
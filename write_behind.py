@@ -0,0 +1,122 @@
+# write_behind.py
+# Buffers user upserts and leaderboard score deltas in memory, coalesced per
+# user, and writes them in a single transaction every `interval` seconds or
+# as soon as `max_pending` users are waiting.
+import sqlite3
+import threading
+from config import logger
+
+UPSERT_USER_SQL = '''
+    INSERT INTO users (user_id, username, first_name) VALUES (?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        username = excluded.username,
+        first_name = excluded.first_name
+    WHERE users.username IS NOT excluded.username
+       OR users.first_name IS NOT excluded.first_name
+'''
+
+ADD_SCORE_SQL = '''
+    INSERT INTO leaderboard (user_id, first_name, score) VALUES (?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        first_name = excluded.first_name,
+        score = leaderboard.score + excluded.score
+'''
+
+
+class WriteBehindQueue:
+    def __init__(self, get_pool, interval, max_pending):
+        self._get_pool = get_pool
+        self.interval = interval
+        self.max_pending = max_pending
+        self._users = {}  # {user_id: (username, first_name)}
+        self._scores = {}  # {user_id: [first_name, points]}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+
+    def upsert_user(self, user_id, username, first_name):
+        with self._cond:
+            self._users[user_id] = (username, first_name)
+            self._wake_if_full()
+
+    def add_score(self, user_id, first_name, points):
+        with self._cond:
+            entry = self._scores.get(user_id)
+            if entry is None:
+                self._scores[user_id] = [first_name, points]
+            else:
+                entry[0] = first_name
+                entry[1] += points
+            self._wake_if_full()
+
+    def pending_user(self, user_id):
+        # (username, first_name) not yet written, or None
+        with self._cond:
+            return self._users.get(user_id)
+
+    def _wake_if_full(self):
+        if len(self._users) + len(self._scores) >= self.max_pending:
+            self._cond.notify()
+
+    def flush(self):
+        # write everything pending in one transaction; on failure the batch
+        # is merged back so the next flush retries it
+        with self._flush_lock:
+            with self._cond:
+                users, self._users = self._users, {}
+                scores, self._scores = self._scores, {}
+            if not users and not scores:
+                return 0
+            try:
+                with self._get_pool().connection() as conn:
+                    if users:
+                        conn.executemany(UPSERT_USER_SQL, [(uid, u, f) for uid, (u, f) in users.items()])
+                    if scores:
+                        conn.executemany(ADD_SCORE_SQL, [(uid, f, p) for uid, (f, p) in scores.items()])
+            except sqlite3.Error as e:
+                logger.error(f"Error flushing {len(users)} users / {len(scores)} scores: {e}")
+                self._merge_back(users, scores)
+                return 0
+            return len(users) + len(scores)
+
+    def _merge_back(self, users, scores):
+        with self._cond:
+            for user_id, user in users.items():
+                self._users.setdefault(user_id, user)
+            for user_id, (first_name, points) in scores.items():
+                entry = self._scores.get(user_id)
+                if entry is None:
+                    self._scores[user_id] = [first_name, points]
+                else:
+                    entry[1] += points
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # stop the writer thread and flush whatever is still pending
+        thread = self._thread
+        if thread is not None:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify()
+            thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._users) + len(self._scores) < self.max_pending:
+                    self._cond.wait(self.interval)
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error in db writer: {e}")